@@ -1,10 +1,19 @@
 """AI Engine module using Groq for interview question generation, analysis, and feedback."""
 
+import copy
+import functools
 import json
 import os
+import re
 from groq import Groq
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 load_dotenv()
 
 # Try to get API key from environment or Streamlit secrets
@@ -24,13 +33,43 @@ else:
 MODEL = "llama-3.3-70b-versatile"
 
 
-def _chat(messages: list, temperature: float = 0.7, max_tokens: int = 2000) -> str:
-    """Send a chat completion request with error handling."""
+def _json_loads(text: str):
+    """Parse a JSON model response, using orjson when it is installed.
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers'
+    existing handlers still apply.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _require_client():
+    """Raise a configuration error if the Groq client is not available."""
     if client is None:
         raise RuntimeError(
             "Groq API key not configured. Please add GROQ_API_KEY to your .env file. "
             "Get a free key at https://console.groq.com/keys"
         )
+
+
+def _api_error(e: Exception) -> RuntimeError:
+    """Translate a Groq client exception into a user-facing error."""
+    error_msg = str(e)
+    if "quota" in error_msg.lower() or "429" in error_msg:
+        return RuntimeError(
+            "Groq API rate limit exceeded. Please wait a moment and try again, or check your usage at https://console.groq.com"
+        )
+    if "invalid_api_key" in error_msg.lower() or "401" in error_msg:
+        return RuntimeError(
+            "Invalid Groq API key. Please check your GROQ_API_KEY configuration."
+        )
+    return RuntimeError(f"Groq API error: {error_msg}")
+
+
+def _chat(messages: list, temperature: float = 0.7, max_tokens: int = 2000) -> str:
+    """Send a chat completion request with error handling."""
+    _require_client()
     try:
         response = client.chat.completions.create(
             model=MODEL,
@@ -40,16 +79,57 @@ def _chat(messages: list, temperature: float = 0.7, max_tokens: int = 2000) -> s
         )
         return response.choices[0].message.content
     except Exception as e:
-        error_msg = str(e)
-        if "quota" in error_msg.lower() or "429" in error_msg:
-            raise RuntimeError(
-                "Groq API rate limit exceeded. Please wait a moment and try again, or check your usage at https://console.groq.com"
-            )
-        if "invalid_api_key" in error_msg.lower() or "401" in error_msg:
-            raise RuntimeError(
-                "Invalid Groq API key. Please check your GROQ_API_KEY configuration."
-            )
-        raise RuntimeError(f"Groq API error: {error_msg}")
+        raise _api_error(e)
+
+
+def _parse_json_reply(result: str):
+    """Parse a JSON model reply, unwrapping a ``` code fence if present."""
+    if result.startswith("```"):
+        result = result.split("\n", 1)[1].rsplit("```", 1)[0]
+    return _json_loads(result)
+
+
+@functools.lru_cache(maxsize=512)
+def _chat_json_cached(messages_json: str, temperature: float, max_tokens: int):
+    """Memoized _chat + JSON parse keyed on the serialized prompt and sampling settings.
+
+    A reply that is not valid JSON raises, so it is never cached.
+    """
+    result = _chat(json.loads(messages_json), temperature=temperature, max_tokens=max_tokens)
+    return _parse_json_reply(result)
+
+
+def _chat_json(messages: list, temperature: float, max_tokens: int, use_cache: bool):
+    """Completion parsed as JSON, through the exact-match cache when use_cache is set.
+
+    Raises json.JSONDecodeError if the reply is not valid JSON. Cached
+    results are deep-copied so callers may modify them. Only use the cache
+    where a repeated reply is acceptable; it freezes sampled output.
+    """
+    if not use_cache:
+        return _parse_json_reply(_chat(messages, temperature=temperature, max_tokens=max_tokens))
+    return copy.deepcopy(
+        _chat_json_cached(json.dumps(messages, sort_keys=True), temperature, max_tokens)
+    )
+
+
+def _chat_stream(messages: list, temperature: float = 0.7, max_tokens: int = 2000):
+    """Stream a chat completion, yielding text deltas as they arrive."""
+    _require_client()
+    try:
+        stream = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        raise _api_error(e)
 
 
 def extract_resume_skills(resume_text: str) -> dict:
@@ -80,7 +160,7 @@ Return ONLY valid JSON, no markdown."""
         # Clean potential markdown wrapper
         if result.startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except json.JSONDecodeError:
         return {
             "skills": [],
@@ -93,33 +173,29 @@ Return ONLY valid JSON, no markdown."""
         }
 
 
-def generate_dsa_question(skills: list, difficulty: str = "medium",
-                          topic: str = None, previous_questions: list = None,
-                          user_memory_context: str = "") -> dict:
-    """Generate a DSA interview question personalized to candidate's skills."""
-    skill_context = ", ".join(skills) if skills else "general programming"
-    prev_context = ""
-    if previous_questions:
-        prev_context = f"\n\nAvoid these previously asked questions:\n" + "\n".join(
-            [f"- {q}" for q in previous_questions[-5:]]
-        )
+def _prompt_messages(system_prompt: str, user_content: str,
+                     user_memory_context: str = "") -> list:
+    """Build a static system prompt, optional memory block, and user turn.
 
-    topic_context = f"\nFocus on the topic: {topic}" if topic else ""
+    Per-call data stays out of the system prompt so its prefix can be
+    reused by provider-side prompt caching.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if user_memory_context:
+        messages.append({"role": "system", "content": user_memory_context})
+    messages.append({"role": "user", "content": user_content})
+    return messages
 
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are an expert technical interviewer conducting a DSA interview.
-The candidate has skills in: {skill_context}
-Difficulty level: {difficulty}{topic_context}{prev_context}
-{user_memory_context}
+
+_DSA_QUESTION_SYSTEM = """You are an expert technical interviewer conducting a DSA interview.
+The candidate's skills, the difficulty level, and any topic or questions to avoid are given in the user message.
 
 Generate a coding interview question. Return a JSON object:
-{{
+{
     "title": "Problem title",
     "description": "Detailed problem description with examples",
     "examples": [
-        {{"input": "...", "output": "...", "explanation": "..."}},
+        {"input": "...", "output": "...", "explanation": "..."},
     ],
     "constraints": ["constraint1", "constraint2"],
     "hints": ["hint1", "hint2"],
@@ -127,21 +203,38 @@ Generate a coding interview question. Return a JSON object:
     "time_complexity": "Expected optimal time complexity",
     "space_complexity": "Expected optimal space complexity",
     "topic_tags": ["Array", "Dynamic Programming", etc.],
-    "difficulty": "{difficulty}",
+    "difficulty": "the requested difficulty level",
     "starter_code_python": "def solution(...):\\n    # Your code here\\n    pass"
-}}
+}
 Return ONLY valid JSON."""
-        },
-        {
-            "role": "user",
-            "content": "Generate the next interview question."
-        }
-    ]
-    result = _chat(messages, temperature=0.8, max_tokens=1500)
+
+
+def generate_dsa_question(skills: list, difficulty: str = "medium",
+                          topic: str = None, previous_questions: list = None,
+                          user_memory_context: str = "", use_cache: bool = False) -> dict:
+    """Generate a DSA interview question personalized to candidate's skills.
+
+    Sampled for variety, so the reply is not cached unless use_cache is set.
+    """
+    skill_context = ", ".join(skills) if skills else "general programming"
+    prev_context = ""
+    if previous_questions:
+        prev_context = f"\n\nAvoid these previously asked questions:\n" + "\n".join(
+            [f"- {q}" for q in previous_questions[-5:]]
+        )
+
+    topic_context = f"\nFocus on the topic: {topic}" if topic else ""
+
+    messages = _prompt_messages(
+        _DSA_QUESTION_SYSTEM,
+        f"""The candidate has skills in: {skill_context}
+Difficulty level: {difficulty}{topic_context}{prev_context}
+
+Generate the next interview question.""",
+        user_memory_context,
+    )
     try:
-        if result.startswith("```"):
-            result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _chat_json(messages, 0.8, 1500, use_cache)
     except json.JSONDecodeError:
         return {
             "title": "Two Sum",
@@ -154,62 +247,37 @@ Return ONLY valid JSON."""
             "space_complexity": "O(n)",
             "topic_tags": ["Array", "Hash Table"],
             "difficulty": difficulty,
-            "starter_code_python": "def solution(nums, target):\n    # Your code here\n    pass"
+            "starter_code_python": "def solution(nums, target):\n    # Your code here\n    pass",
+            "is_fallback": True,
         }
 
 
-def analyze_candidate_response(question: dict, code: str, voice_transcript: str,
-                               conversation_history: list = None,
-                               user_memory_context: str = "") -> dict:
-    """Analyze candidate's code and verbal explanation."""
-    conv_context = ""
-    if conversation_history:
-        conv_context = "\n\nConversation so far:\n" + "\n".join(
-            [f"{m['role']}: {m['content']}" for m in conversation_history[-10:]]
-        )
-
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are an expert technical interviewer analyzing a candidate's response.
-{user_memory_context}
-Question: {question.get('title', '')}: {question.get('description', '')}
-Expected approach: {question.get('expected_approach', '')}
-Expected time complexity: {question.get('time_complexity', '')}
-Expected space complexity: {question.get('space_complexity', '')}
-{conv_context}
-
-Candidate's code:
-```
-{code}
-```
-
-Candidate's verbal explanation:
-"{voice_transcript}"
+_ANALYSIS_SYSTEM = """You are an expert technical interviewer analyzing a candidate's response.
+The question, the expected solution, the conversation so far, and the candidate's code and verbal explanation are given in the user message.
 
 Analyze the response thoroughly. Return a JSON object:
-{{
-    "code_correctness": {{
+{
+    "code_correctness": {
         "score": 0-10,
         "is_correct": true/false,
         "issues": ["issue1", "issue2"],
         "edge_cases_handled": true/false
-    }},
-    "approach_analysis": {{
+    },
+    "approach_analysis": {
         "score": 0-10,
         "approach_used": "description of approach",
         "is_optimal": true/false,
         "time_complexity_achieved": "O(...)",
         "space_complexity_achieved": "O(...)",
         "reasoning_quality": "excellent/good/fair/poor"
-    }},
-    "communication_analysis": {{
+    },
+    "communication_analysis": {
         "score": 0-10,
         "clarity": "excellent/good/fair/poor",
         "structure": "excellent/good/fair/poor",
         "technical_vocabulary": "excellent/good/fair/poor",
         "explanation_quality": "Brief assessment"
-    }},
+    },
     "overall_feedback": "Detailed constructive feedback paragraph",
     "strengths": ["strength1", "strength2"],
     "improvements": ["improvement1", "improvement2"],
@@ -219,27 +287,50 @@ Analyze the response thoroughly. Return a JSON object:
         "Follow-up question 3 about edge cases"
     ],
     "suggested_solutions": [
-        {{
+        {
             "approach": "Approach name",
             "description": "Brief description",
             "code": "Python code for this approach",
             "time_complexity": "O(...)",
             "space_complexity": "O(...)"
-        }}
-    ]
-}}
-Return ONLY valid JSON."""
-        },
-        {
-            "role": "user",
-            "content": "Analyze the candidate's response now."
         }
     ]
-    result = _chat(messages, temperature=0.3, max_tokens=3000)
+}
+Return ONLY valid JSON."""
+
+
+def analyze_candidate_response(question: dict, code: str, voice_transcript: str,
+                               conversation_history: list = None,
+                               user_memory_context: str = "",
+                               use_cache: bool = True) -> dict:
+    """Analyze candidate's code and verbal explanation."""
+    conv_context = ""
+    if conversation_history:
+        conv_context = "\n\nConversation so far:\n" + "\n".join(
+            [f"{m['role']}: {m['content']}" for m in conversation_history[-10:]]
+        )
+
+    messages = _prompt_messages(
+        _ANALYSIS_SYSTEM,
+        f"""Question: {question.get('title', '')}: {question.get('description', '')}
+Expected approach: {question.get('expected_approach', '')}
+Expected time complexity: {question.get('time_complexity', '')}
+Expected space complexity: {question.get('space_complexity', '')}
+{conv_context}
+
+Candidate's code:
+```
+{code}
+```
+
+Candidate's verbal explanation:
+"{voice_transcript}"
+
+Analyze the candidate's response now.""",
+        user_memory_context,
+    )
     try:
-        if result.startswith("```"):
-            result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _chat_json(messages, 0.3, 3000, use_cache)
     except json.JSONDecodeError:
         return {
             "code_correctness": {"score": 5, "is_correct": False, "issues": ["Unable to analyze"], "edge_cases_handled": False},
@@ -253,10 +344,26 @@ Return ONLY valid JSON."""
         }
 
 
+_INTERVIEWER_SYSTEM = """You are a friendly but thorough technical interviewer conducting a DSA interview.
+You should respond naturally, like a real interviewer would.
+
+Guidelines:
+- If the candidate is on the right track, encourage them and ask probing questions
+- If they're stuck, give subtle hints without giving away the answer
+- Ask about time/space complexity when appropriate
+- Probe for edge case handling
+- Keep responses concise (2-4 sentences)
+- Be professional and encouraging"""
+
+
 def generate_interviewer_response(question: dict, conversation_history: list,
                                   analysis: dict = None,
-                                  user_memory_context: str = "") -> str:
-    """Generate a natural interviewer response based on conversation context."""
+                                  user_memory_context: str = "",
+                                  stream: bool = False):
+    """Generate a natural interviewer response based on conversation context.
+
+    With stream=True, returns an iterator of text deltas instead of a string.
+    """
     conv_context = "\n".join(
         [f"{m['role']}: {m['content']}" for m in conversation_history[-10:]]
     )
@@ -270,67 +377,57 @@ Current analysis of candidate:
 - Communication: {analysis.get('communication_analysis', {}).get('score', 'N/A')}/10
 """
 
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are a friendly but thorough technical interviewer conducting a DSA interview.
-You should respond naturally, like a real interviewer would.
-{user_memory_context}
-Current question: {question.get('title', '')}: {question.get('description', '')}
+    messages = _prompt_messages(
+        _INTERVIEWER_SYSTEM,
+        f"""Current question: {question.get('title', '')}: {question.get('description', '')}
 {analysis_context}
+Conversation so far:
+{conv_context}
 
-Guidelines:
-- If the candidate is on the right track, encourage them and ask probing questions
-- If they're stuck, give subtle hints without giving away the answer
-- Ask about time/space complexity when appropriate
-- Probe for edge case handling
-- Keep responses concise (2-4 sentences)
-- Be professional and encouraging"""
-        },
-        {
-            "role": "user",
-            "content": f"Conversation so far:\n{conv_context}\n\nGenerate the interviewer's next response."
-        }
-    ]
+Generate the interviewer's next response.""",
+        user_memory_context,
+    )
+    if stream:
+        return _chat_stream(messages, temperature=0.7, max_tokens=300)
     return _chat(messages, temperature=0.7, max_tokens=300)
 
 
-def generate_hr_questions(skills: list, experience: list, role: str = "Software Engineer",
-                          user_memory_context: str = "") -> list:
-    """Generate HR interview questions personalized to the candidate."""
-    skill_context = ", ".join(skills) if skills else "general software development"
-    exp_context = json.dumps(experience[:3]) if experience else "entry-level"
-
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are an HR interviewer preparing questions for a {role} position.
-Candidate's skills: {skill_context}
-Candidate's experience: {exp_context}
-{user_memory_context}
+_HR_QUESTIONS_SYSTEM = """You are an HR interviewer preparing interview questions.
+The target role and the candidate's skills and experience are given in the user message.
 
 Generate 8 HR interview questions personalized to this candidate. Mix behavioral and situational questions.
 Return a JSON array of objects:
 [
-    {{
+    {
         "question": "The question text",
         "category": "behavioral/situational/technical-behavioral/culture-fit",
         "what_to_look_for": "Key points in an ideal answer",
         "follow_ups": ["follow-up 1", "follow-up 2"]
-    }}
+    }
 ]
 Return ONLY valid JSON."""
-        },
-        {
-            "role": "user",
-            "content": "Generate the HR interview questions."
-        }
-    ]
+
+
+def generate_hr_questions(skills: list, experience: list, role: str = "Software Engineer",
+                          user_memory_context: str = "") -> list:
+    """Generate HR interview questions personalized to the candidate."""
+    skill_context = ", ".join(skills) if skills else "general software development"
+    exp_context = json.dumps(experience[:3]) if experience else "entry-level"
+
+    messages = _prompt_messages(
+        _HR_QUESTIONS_SYSTEM,
+        f"""Target role: {role}
+Candidate's skills: {skill_context}
+Candidate's experience: {exp_context}
+
+Generate the HR interview questions.""",
+        user_memory_context,
+    )
     result = _chat(messages, temperature=0.7, max_tokens=2000)
     try:
         if result.startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except json.JSONDecodeError:
         return [
             {"question": "Tell me about yourself.", "category": "behavioral", "what_to_look_for": "Clear, structured response", "follow_ups": ["What motivated your career choice?"]},
@@ -338,21 +435,28 @@ Return ONLY valid JSON."""
         ]
 
 
-def analyze_hr_response(question: str, response_text: str, what_to_look_for: str,
-                        user_memory_context: str = "") -> dict:
-    """Analyze candidate's HR interview response."""
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are an expert HR interviewer analyzing a candidate's response.
-{user_memory_context}
-Question: {question}
-Key points to evaluate: {what_to_look_for}
+def _hr_analysis_fallback() -> dict:
+    """Neutral HR analysis used when the model output cannot be parsed."""
+    return {
+        "communication_score": 5,
+        "relevance_score": 5,
+        "depth_score": 5,
+        "confidence_level": "medium",
+        "key_points_covered": [],
+        "missing_points": [],
+        "feedback": "Unable to fully analyze.",
+        "strengths": [],
+        "improvements": [],
+        "follow_up_questions": [],
+        "is_fallback": True,
+    }
 
-Candidate's response: "{response_text}"
+
+_HR_ANALYSIS_SYSTEM = """You are an expert HR interviewer analyzing a candidate's response.
+The question, the key points to evaluate, and the candidate's response are given in the user message.
 
 Return a JSON object:
-{{
+{
     "communication_score": 0-10,
     "relevance_score": 0-10,
     "depth_score": 0-10,
@@ -363,32 +467,148 @@ Return a JSON object:
     "strengths": ["strength1"],
     "improvements": ["improvement1"],
     "follow_up_questions": ["question1", "question2"]
-}}
+}
 Return ONLY valid JSON."""
-        },
-        {
-            "role": "user",
-            "content": "Analyze the candidate's response."
-        }
-    ]
+
+
+def analyze_hr_response(question: str, response_text: str, what_to_look_for: str,
+                        user_memory_context: str = "") -> dict:
+    """Analyze candidate's HR interview response."""
+    messages = _prompt_messages(
+        _HR_ANALYSIS_SYSTEM,
+        f"""Question: {question}
+Key points to evaluate: {what_to_look_for}
+
+Candidate's response: "{response_text}"
+
+Analyze the candidate's response.""",
+        user_memory_context,
+    )
     result = _chat(messages, temperature=0.3, max_tokens=1000)
     try:
         if result.startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except json.JSONDecodeError:
-        return {
-            "communication_score": 5,
-            "relevance_score": 5,
-            "depth_score": 5,
-            "confidence_level": "medium",
-            "key_points_covered": [],
-            "missing_points": [],
-            "feedback": "Unable to fully analyze.",
-            "strengths": [],
-            "improvements": [],
-            "follow_up_questions": []
-        }
+        return _hr_analysis_fallback()
+
+
+def _partial_json_string(text: str, key: str) -> str:
+    """Best-effort value of a string field in a JSON document that is still arriving."""
+    match = re.search(rf'"{re.escape(key)}"\s*:\s*"', text)
+    if not match:
+        return ""
+    value = text[match.end():]
+    escaped = False
+    for i, ch in enumerate(value):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            value = value[:i]
+            break
+    else:
+        # Drop an escape sequence that has not fully arrived yet
+        if escaped:
+            value = value[:-1]
+        value = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", value)
+    try:
+        return json.loads(f'"{value}"')
+    except json.JSONDecodeError:
+        return value
+
+
+def analyze_hr_response_stream(question: str, response_text: str, what_to_look_for: str,
+                               user_memory_context: str = ""):
+    """Stream an HR response analysis.
+
+    Yields the feedback text received so far each time it grows, then
+    yields the complete analysis dict once the response has finished.
+    """
+    messages = _prompt_messages(
+        _HR_ANALYSIS_SYSTEM,
+        f"""Question: {question}
+Key points to evaluate: {what_to_look_for}
+
+Candidate's response: "{response_text}"
+
+Analyze the candidate's response.""",
+        user_memory_context,
+    )
+    result = ""
+    feedback = ""
+    for delta in _chat_stream(messages, temperature=0.3, max_tokens=1000):
+        result += delta
+        partial = _partial_json_string(result, "feedback")
+        if len(partial) > len(feedback):
+            feedback = partial
+            yield feedback
+    result = result.strip()
+    try:
+        if result.startswith("```"):
+            result = result.split("\n", 1)[1].rsplit("```", 1)[0]
+        yield _json_loads(result)
+    except json.JSONDecodeError:
+        yield _hr_analysis_fallback()
+
+
+_HR_BATCH_ANALYSIS_SYSTEM = """You are an expert HR interviewer analyzing several candidate responses.
+Each response in the user message is tagged with a position identifier like [1], [2], ...
+
+Analyze every response independently. Return a JSON array with one object per response:
+[
+    {
+        "index": 1,
+        "communication_score": 0-10,
+        "relevance_score": 0-10,
+        "depth_score": 0-10,
+        "confidence_level": "high/medium/low",
+        "key_points_covered": ["point1", "point2"],
+        "missing_points": ["point1", "point2"],
+        "feedback": "Constructive feedback paragraph",
+        "strengths": ["strength1"],
+        "improvements": ["improvement1"],
+        "follow_up_questions": ["question1", "question2"]
+    }
+]
+The "index" must match the response's position identifier.
+Return ONLY valid JSON."""
+
+
+def analyze_hr_responses_batch(items: list, user_memory_context: str = "") -> list:
+    """Analyze several HR responses in a single request.
+
+    items is a list of dicts with question, response_text and
+    what_to_look_for keys. Returns one analysis dict per item, in order.
+    """
+    if not items:
+        return []
+
+    numbered = "\n\n".join(
+        f"[{i}] Question: {item['question']}\n"
+        f"Key points to evaluate: {item.get('what_to_look_for', '')}\n"
+        f"Candidate's response: \"{item['response_text']}\""
+        for i, item in enumerate(items, 1)
+    )
+    messages = _prompt_messages(
+        _HR_BATCH_ANALYSIS_SYSTEM,
+        f"{numbered}\n\nAnalyze each candidate response above.",
+        user_memory_context,
+    )
+    result = _chat(messages, temperature=0.3, max_tokens=min(1000 * len(items), 6000))
+    try:
+        if result.startswith("```"):
+            result = result.split("\n", 1)[1].rsplit("```", 1)[0]
+        parsed = _json_loads(result)
+    except json.JSONDecodeError:
+        parsed = []
+
+    by_index = {}
+    for entry in parsed if isinstance(parsed, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("index"), int):
+            by_index[entry.pop("index")] = entry
+    return [by_index.get(i, _hr_analysis_fallback()) for i in range(1, len(items) + 1)]
 
 
 def generate_final_report(session_questions: list, session_type: str,
@@ -445,7 +665,7 @@ Return ONLY valid JSON."""
     try:
         if result.startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except json.JSONDecodeError:
         return {
             "overall_score": 50,
@@ -549,7 +769,7 @@ def voice_agent_final_evaluation(conversation_history: list) -> dict:
     try:
         if result.strip().startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except json.JSONDecodeError:
         return {
             "question_asked": "Unknown",
@@ -640,7 +860,7 @@ def voice_agent_final_evaluation(conversation_history: list) -> dict:
     try:
         if result.strip().startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except Exception:
         return {
             "question_asked": "Unknown",
@@ -731,7 +951,7 @@ def voice_agent_final_evaluation(conversation_history: list) -> dict:
     try:
         if result.strip().startswith("```"):
             result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        return json.loads(result)
+        return _json_loads(result)
     except Exception:
         return {
             "question_asked": "Unknown",
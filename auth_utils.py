@@ -44,6 +44,14 @@ def login(email: str, password: str) -> bool:
     return False
 
 
+def verify_password(user_id: int, password: str) -> bool:
+    """Check a user's password without logging in or issuing a token."""
+    user = db.get_user(user_id)
+    if not user or not user.get('password_hash') or not user.get('salt'):
+        return False
+    return db.verify_password(password, user['password_hash'], user['salt'])
+
+
 def register(name: str, email: str, password: str) -> bool:
     """Register a new user."""
     try:
@@ -13,15 +13,16 @@ def inject_browser_lock(session_id: int):
     - Keyboard shortcut prevention (Ctrl+Tab, Alt+Tab, etc.)
     """
     lock_js = f"""
-    <div id="browser-lock-overlay" style="display:none; position:fixed; top:0; left:0; width:100vw; height:100vh;
-         background: rgba(220,38,38,0.95); z-index:999999; display:flex; align-items:center; justify-content:center;
+    <style>#browser-lock-overlay:not([hidden]) {{ display:flex; }}</style>
+    <div id="browser-lock-overlay" hidden style="position:fixed; top:0; left:0; width:100vw; height:100vh;
+         background: rgba(220,38,38,0.95); z-index:999999; align-items:center; justify-content:center;
          flex-direction:column; color:white; font-family:sans-serif;">
         <div style="text-align:center; padding:40px;">
             <h1 style="font-size:3em; margin-bottom:20px;">Warning!</h1>
             <p style="font-size:1.5em; margin-bottom:10px;">Tab switch / window change detected!</p>
             <p style="font-size:1.2em; margin-bottom:30px;">This violation has been recorded.</p>
             <p id="violation-count" style="font-size:1.1em; color:#fca5a5;"></p>
-            <button onclick="document.getElementById('browser-lock-overlay').style.display='none'"
+            <button onclick="document.getElementById('browser-lock-overlay').hidden = true"
                     style="margin-top:20px; padding:12px 30px; font-size:1.1em; cursor:pointer;
                            background:#fff; color:#dc2626; border:none; border-radius:8px; font-weight:bold;">
                 Return to Interview
@@ -43,7 +44,7 @@ def inject_browser_lock(session_id: int):
                 // Show warning overlay
                 const overlay = document.getElementById('browser-lock-overlay');
                 if (overlay) {{
-                    overlay.style.display = 'flex';
+                    overlay.hidden = false;
                     document.getElementById('violation-count').textContent =
                         'Total violations this session: ' + violationCount;
                 }}
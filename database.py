@@ -5,197 +5,251 @@ import json
 import os
 import hashlib
 import secrets
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 DB_PATH = os.environ.get("DB_PATH", "interview_system.db")
 
+# Streamlit runs every script rerun on its own thread, so each thread keeps
+# its own connection and WAL lets their readers and writer overlap.
+_local = threading.local()
+
 
 def get_connection() -> sqlite3.Connection:
-    """Get a database connection with row factory."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    """Get this thread's database connection with row factory.
+
+    The connection is opened once per thread and reused, so the PRAGMA setup
+    and file open are paid only on first use.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
     return conn
 
 
-def init_db():
-    """Initialize all database tables."""
+@contextmanager
+def _cursor():
+    """Yield a cursor on this thread's connection, committing on success."""
     conn = get_connection()
     cursor = conn.cursor()
-    
-    # First, check if we need to migrate existing users table
-    cursor.execute("PRAGMA table_info(users)")
-    columns = [row[1] for row in cursor.fetchall()]
-    
-    # If users table exists but doesn't have password_hash, we need to migrate
-    if columns and 'password_hash' not in columns:
-        print("Migrating users table to add authentication columns...")
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def init_db():
+    """Initialize all database tables."""
+    with _cursor() as cursor:
+        # First, check if we need to migrate existing users table
+        cursor.execute("PRAGMA table_info(users)")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        # If users table exists but doesn't have password_hash, we need to migrate
+        if columns and 'password_hash' not in columns:
+            print("Migrating users table to add authentication columns...")
+            cursor.executescript("""
+                ALTER TABLE users ADD COLUMN password_hash TEXT;
+                ALTER TABLE users ADD COLUMN salt TEXT;
+                ALTER TABLE users ADD COLUMN is_active INTEGER DEFAULT 1;
+                ALTER TABLE users ADD COLUMN last_login TIMESTAMP;
+            """)
+            print("Migration complete!")
+
         cursor.executescript("""
-            ALTER TABLE users ADD COLUMN password_hash TEXT;
-            ALTER TABLE users ADD COLUMN salt TEXT;
-            ALTER TABLE users ADD COLUMN is_active INTEGER DEFAULT 1;
-            ALTER TABLE users ADD COLUMN last_login TIMESTAMP;
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT,
+                salt TEXT,
+                is_active INTEGER DEFAULT 1,
+                last_login TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS resumes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                raw_text TEXT,
+                skills_json TEXT DEFAULT '[]',
+                experience_json TEXT DEFAULT '[]',
+                education_json TEXT DEFAULT '[]',
+                summary TEXT,
+                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS interview_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                session_type TEXT NOT NULL CHECK(session_type IN ('dsa', 'hr', 'technical')),
+                status TEXT DEFAULT 'in_progress' CHECK(status IN ('in_progress', 'completed', 'abandoned')),
+                difficulty TEXT DEFAULT 'medium' CHECK(difficulty IN ('easy', 'medium', 'hard')),
+                topic TEXT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ended_at TIMESTAMP,
+                overall_score REAL DEFAULT 0,
+                technical_score REAL DEFAULT 0,
+                communication_score REAL DEFAULT 0,
+                reasoning_score REAL DEFAULT 0,
+                problem_solving_score REAL DEFAULT 0,
+                feedback_json TEXT DEFAULT '{}',
+                tab_violations INTEGER DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS interview_questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                question_number INTEGER NOT NULL,
+                question_text TEXT NOT NULL,
+                question_type TEXT DEFAULT 'coding',
+                difficulty TEXT DEFAULT 'medium',
+                candidate_response_text TEXT,
+                candidate_code TEXT,
+                voice_transcript TEXT,
+                ai_analysis TEXT,
+                code_correctness_score REAL DEFAULT 0,
+                approach_score REAL DEFAULT 0,
+                communication_score REAL DEFAULT 0,
+                follow_up_questions_json TEXT DEFAULT '[]',
+                suggested_solutions_json TEXT DEFAULT '[]',
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS tab_violations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                violation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                violation_type TEXT DEFAULT 'tab_switch',
+                details TEXT,
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                role TEXT NOT NULL CHECK(role IN ('interviewer', 'candidate', 'system')),
+                content TEXT NOT NULL,
+                message_type TEXT DEFAULT 'text' CHECK(message_type IN ('text', 'code', 'audio_transcript')),
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS interview_recordings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                event_type TEXT NOT NULL CHECK(event_type IN ('code_snapshot', 'conversation', 'audio_clip', 'analysis', 'question_start')),
+                event_data TEXT NOT NULL DEFAULT '{}',
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS user_memory (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                memory_key TEXT NOT NULL,
+                memory_value TEXT NOT NULL,
+                category TEXT DEFAULT 'general' CHECK(category IN ('general', 'preference', 'skill', 'personal', 'interview_style')),
+                source_session_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id),
+                FOREIGN KEY (source_session_id) REFERENCES interview_sessions(id),
+                UNIQUE(user_id, memory_key)
+            );
+
+            CREATE TABLE IF NOT EXISTS proctoring_violations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                violation_type TEXT NOT NULL CHECK(violation_type IN ('no_face', 'multiple_faces', 'looking_away', 'other')),
+                detail TEXT,
+                violation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS auth_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                token TEXT UNIQUE NOT NULL,
+                token_type TEXT DEFAULT 'session' CHECK(token_type IN ('session', 'refresh', 'api')),
+                expires_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                is_active INTEGER DEFAULT 1,
+                device_info TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS activity_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                session_id INTEGER,
+                action TEXT NOT NULL,
+                action_type TEXT DEFAULT 'general' CHECK(action_type IN ('general', 'authentication', 'interview', 'resume', 'violation', 'system')),
+                details TEXT,
+                ip_address TEXT,
+                user_agent TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id),
+                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS question_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                difficulty TEXT NOT NULL,
+                topic TEXT,
+                skills_key TEXT NOT NULL,
+                title TEXT NOT NULL,
+                question_json TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_auth_tokens_user ON auth_tokens(user_id);
+            CREATE INDEX IF NOT EXISTS idx_auth_tokens_token ON auth_tokens(token);
+            CREATE INDEX IF NOT EXISTS idx_activity_logs_user ON activity_logs(user_id);
+            CREATE INDEX IF NOT EXISTS idx_activity_logs_session ON activity_logs(session_id);
+            CREATE INDEX IF NOT EXISTS idx_activity_logs_created ON activity_logs(created_at);
+            CREATE INDEX IF NOT EXISTS idx_question_cache_bucket ON question_cache(difficulty, topic);
         """)
-        conn.commit()
-        print("Migration complete!")
-
-    cursor.executescript("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT,
-            salt TEXT,
-            is_active INTEGER DEFAULT 1,
-            last_login TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS resumes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            filename TEXT NOT NULL,
-            raw_text TEXT,
-            skills_json TEXT DEFAULT '[]',
-            experience_json TEXT DEFAULT '[]',
-            education_json TEXT DEFAULT '[]',
-            summary TEXT,
-            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS interview_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            session_type TEXT NOT NULL CHECK(session_type IN ('dsa', 'hr', 'technical')),
-            status TEXT DEFAULT 'in_progress' CHECK(status IN ('in_progress', 'completed', 'abandoned')),
-            difficulty TEXT DEFAULT 'medium' CHECK(difficulty IN ('easy', 'medium', 'hard')),
-            topic TEXT,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ended_at TIMESTAMP,
-            overall_score REAL DEFAULT 0,
-            technical_score REAL DEFAULT 0,
-            communication_score REAL DEFAULT 0,
-            reasoning_score REAL DEFAULT 0,
-            problem_solving_score REAL DEFAULT 0,
-            feedback_json TEXT DEFAULT '{}',
-            tab_violations INTEGER DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS interview_questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            question_number INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            question_type TEXT DEFAULT 'coding',
-            difficulty TEXT DEFAULT 'medium',
-            candidate_response_text TEXT,
-            candidate_code TEXT,
-            voice_transcript TEXT,
-            ai_analysis TEXT,
-            code_correctness_score REAL DEFAULT 0,
-            approach_score REAL DEFAULT 0,
-            communication_score REAL DEFAULT 0,
-            follow_up_questions_json TEXT DEFAULT '[]',
-            suggested_solutions_json TEXT DEFAULT '[]',
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS tab_violations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            violation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            violation_type TEXT DEFAULT 'tab_switch',
-            details TEXT,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('interviewer', 'candidate', 'system')),
-            content TEXT NOT NULL,
-            message_type TEXT DEFAULT 'text' CHECK(message_type IN ('text', 'code', 'audio_transcript')),
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS interview_recordings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            event_type TEXT NOT NULL CHECK(event_type IN ('code_snapshot', 'conversation', 'audio_clip', 'analysis', 'question_start')),
-            event_data TEXT NOT NULL DEFAULT '{}',
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS user_memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            memory_key TEXT NOT NULL,
-            memory_value TEXT NOT NULL,
-            category TEXT DEFAULT 'general' CHECK(category IN ('general', 'preference', 'skill', 'personal', 'interview_style')),
-            source_session_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (source_session_id) REFERENCES interview_sessions(id),
-            UNIQUE(user_id, memory_key)
-        );
-
-        CREATE TABLE IF NOT EXISTS proctoring_violations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            violation_type TEXT NOT NULL CHECK(violation_type IN ('no_face', 'multiple_faces', 'looking_away', 'other')),
-            detail TEXT,
-            violation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS auth_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            token TEXT UNIQUE NOT NULL,
-            token_type TEXT DEFAULT 'session' CHECK(token_type IN ('session', 'refresh', 'api')),
-            expires_at TIMESTAMP NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_active INTEGER DEFAULT 1,
-            device_info TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS activity_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            session_id INTEGER,
-            action TEXT NOT NULL,
-            action_type TEXT DEFAULT 'general' CHECK(action_type IN ('general', 'authentication', 'interview', 'resume', 'violation', 'system')),
-            details TEXT,
-            ip_address TEXT,
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_auth_tokens_user ON auth_tokens(user_id);
-        CREATE INDEX IF NOT EXISTS idx_auth_tokens_token ON auth_tokens(token);
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_user ON activity_logs(user_id);
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_session ON activity_logs(session_id);
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_created ON activity_logs(created_at);
-    """)
-
-    conn.commit()
-    conn.close()
 
 
 # ---- Utility Functions ----
 
+def _json_dumps(obj) -> str:
+    """Serialize a JSON column value, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def _json_loads(text: str):
+    """Parse a JSON column value, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
 def hash_password(password: str, salt: str = None) -> tuple:
     """Hash a password with salt. Returns (hash, salt)."""
     if salt is None:
@@ -220,46 +274,38 @@ def generate_token() -> str:
 
 def create_user(name: str, email: str, password: str = None) -> int:
     """Create a new user and return their ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     pwd_hash = None
     salt = None
     if password:
         pwd_hash, salt = hash_password(password)
-    
-    cursor.execute("""
-        INSERT OR IGNORE INTO users (name, email, password_hash, salt) 
-        VALUES (?, ?, ?, ?)
-    """, (name, email, pwd_hash, salt))
-    conn.commit()
-    
-    if cursor.lastrowid == 0:
-        cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
-        user_id = cursor.fetchone()["id"]
-    else:
-        user_id = cursor.lastrowid
-    conn.close()
+
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT OR IGNORE INTO users (name, email, password_hash, salt) 
+            VALUES (?, ?, ?, ?)
+        """, (name, email, pwd_hash, salt))
+
+        if cursor.lastrowid == 0:
+            cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
+            user_id = cursor.fetchone()["id"]
+        else:
+            user_id = cursor.lastrowid
     return user_id
 
 
 def get_user_by_email(email: str) -> Optional[dict]:
     """Get user by email."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    row = cursor.fetchone()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
 def get_user(user_id: int) -> Optional[dict]:
     """Get user by ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
@@ -273,13 +319,10 @@ def authenticate_user(email: str, password: str) -> Optional[dict]:
     
     if verify_password(password, user['password_hash'], user['salt']):
         # Update last login
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
-        """, (user['id'],))
-        conn.commit()
-        conn.close()
+        with _cursor() as cursor:
+            cursor.execute("""
+                UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
+            """, (user['id'],))
         return user
     return None
 
@@ -290,91 +333,73 @@ def create_auth_token(user_id: int, token_type: str = 'session',
     token = generate_token()
     expires_at = datetime.now() + timedelta(hours=expires_in_hours)
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO auth_tokens (user_id, token, token_type, expires_at, device_info)
-        VALUES (?, ?, ?, ?, ?)
-    """, (user_id, token, token_type, expires_at, device_info))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO auth_tokens (user_id, token, token_type, expires_at, device_info)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, token, token_type, expires_at, device_info))
     return token
 
 
 def verify_auth_token(token: str) -> Optional[dict]:
     """Verify an auth token and return associated user if valid."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, u.* FROM auth_tokens t
-        JOIN users u ON t.user_id = u.id
-        WHERE t.token = ? AND t.is_active = 1 AND t.expires_at > CURRENT_TIMESTAMP
-    """, (token,))
-    row = cursor.fetchone()
-    
-    if row:
-        # Update last_used timestamp
+    with _cursor() as cursor:
         cursor.execute("""
-            UPDATE auth_tokens SET last_used = CURRENT_TIMESTAMP WHERE token = ?
+            SELECT t.*, u.* FROM auth_tokens t
+            JOIN users u ON t.user_id = u.id
+            WHERE t.token = ? AND t.is_active = 1 AND t.expires_at > CURRENT_TIMESTAMP
         """, (token,))
-        conn.commit()
-    
-    conn.close()
+        row = cursor.fetchone()
+
+        if row:
+            # Update last_used timestamp
+            cursor.execute("""
+                UPDATE auth_tokens SET last_used = CURRENT_TIMESTAMP WHERE token = ?
+            """, (token,))
     return dict(row) if row else None
 
 
 def invalidate_auth_token(token: str):
     """Invalidate/logout a specific token."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE auth_tokens SET is_active = 0 WHERE token = ?
-    """, (token,))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            UPDATE auth_tokens SET is_active = 0 WHERE token = ?
+        """, (token,))
 
 
 def invalidate_user_tokens(user_id: int, token_type: str = None):
     """Invalidate all tokens for a user (logout all sessions)."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    if token_type:
-        cursor.execute("""
-            UPDATE auth_tokens SET is_active = 0 
-            WHERE user_id = ? AND token_type = ?
-        """, (user_id, token_type))
-    else:
-        cursor.execute("""
-            UPDATE auth_tokens SET is_active = 0 WHERE user_id = ?
-        """, (user_id,))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        if token_type:
+            cursor.execute("""
+                UPDATE auth_tokens SET is_active = 0 
+                WHERE user_id = ? AND token_type = ?
+            """, (user_id, token_type))
+        else:
+            cursor.execute("""
+                UPDATE auth_tokens SET is_active = 0 WHERE user_id = ?
+            """, (user_id,))
 
 
 def get_user_active_tokens(user_id: int) -> list:
     """Get all active tokens for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM auth_tokens 
-        WHERE user_id = ? AND is_active = 1 AND expires_at > CURRENT_TIMESTAMP
-        ORDER BY created_at DESC
-    """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM auth_tokens 
+            WHERE user_id = ? AND is_active = 1 AND expires_at > CURRENT_TIMESTAMP
+            ORDER BY created_at DESC
+        """, (user_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
 def update_user_password(user_id: int, new_password: str):
     """Update a user's password."""
     pwd_hash, salt = hash_password(new_password)
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE users SET password_hash = ?, salt = ? WHERE id = ?
-    """, (pwd_hash, salt, user_id))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            UPDATE users SET password_hash = ?, salt = ? WHERE id = ?
+        """, (pwd_hash, salt, user_id))
 
 
 # ---- Activity Log Operations ----
@@ -383,54 +408,46 @@ def log_activity(user_id: int, action: str, action_type: str = 'general',
                 details: str = None, session_id: int = None, 
                 ip_address: str = None, user_agent: str = None) -> int:
     """Log a user activity."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO activity_logs 
-        (user_id, session_id, action, action_type, details, ip_address, user_agent)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (user_id, session_id, action, action_type, details, ip_address, user_agent))
-    conn.commit()
-    log_id = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO activity_logs 
+            (user_id, session_id, action, action_type, details, ip_address, user_agent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, session_id, action, action_type, details, ip_address, user_agent))
+        log_id = cursor.lastrowid
     return log_id
 
 
 def get_user_activity_logs(user_id: int, limit: int = 100, 
                           action_type: str = None) -> list:
     """Get activity logs for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if action_type:
-        cursor.execute("""
-            SELECT * FROM activity_logs 
-            WHERE user_id = ? AND action_type = ?
-            ORDER BY created_at DESC LIMIT ?
-        """, (user_id, action_type, limit))
-    else:
-        cursor.execute("""
-            SELECT * FROM activity_logs 
-            WHERE user_id = ?
-            ORDER BY created_at DESC LIMIT ?
-        """, (user_id, limit))
-    
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        if action_type:
+            cursor.execute("""
+                SELECT * FROM activity_logs 
+                WHERE user_id = ? AND action_type = ?
+                ORDER BY created_at DESC LIMIT ?
+            """, (user_id, action_type, limit))
+        else:
+            cursor.execute("""
+                SELECT * FROM activity_logs 
+                WHERE user_id = ?
+                ORDER BY created_at DESC LIMIT ?
+            """, (user_id, limit))
+
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
 def get_session_activity_logs(session_id: int) -> list:
     """Get all activity logs for a specific interview session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM activity_logs 
-        WHERE session_id = ?
-        ORDER BY created_at ASC
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM activity_logs 
+            WHERE session_id = ?
+            ORDER BY created_at ASC
+        """, (session_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
@@ -439,33 +456,28 @@ def get_session_activity_logs(session_id: int) -> list:
 def save_resume(user_id: int, filename: str, raw_text: str, skills: list,
                 experience: list, education: list, summary: str) -> int:
     """Save a parsed resume."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO resumes (user_id, filename, raw_text, skills_json, experience_json, education_json, summary)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (user_id, filename, raw_text, json.dumps(skills), json.dumps(experience),
-          json.dumps(education), summary))
-    conn.commit()
-    resume_id = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO resumes (user_id, filename, raw_text, skills_json, experience_json, education_json, summary)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, filename, raw_text, _json_dumps(skills), _json_dumps(experience),
+              _json_dumps(education), summary))
+        resume_id = cursor.lastrowid
     return resume_id
 
 
 def get_latest_resume(user_id: int) -> Optional[dict]:
     """Get the latest resume for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM resumes WHERE user_id = ? ORDER BY uploaded_at DESC LIMIT 1
-    """, (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM resumes WHERE user_id = ? ORDER BY uploaded_at DESC LIMIT 1
+        """, (user_id,))
+        row = cursor.fetchone()
     if row:
         result = dict(row)
-        result["skills"] = json.loads(result["skills_json"])
-        result["experience"] = json.loads(result["experience_json"])
-        result["education"] = json.loads(result["education_json"])
+        result["skills"] = _json_loads(result["skills_json"])
+        result["experience"] = _json_loads(result["experience_json"])
+        result["education"] = _json_loads(result["education_json"])
         return result
     return None
 
@@ -475,101 +487,103 @@ def get_latest_resume(user_id: int) -> Optional[dict]:
 def create_session(user_id: int, session_type: str, difficulty: str = "medium",
                    topic: str = None) -> int:
     """Create a new interview session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO interview_sessions (user_id, session_type, difficulty, topic)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, session_type, difficulty, topic))
-    conn.commit()
-    session_id = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO interview_sessions (user_id, session_type, difficulty, topic)
+            VALUES (?, ?, ?, ?)
+        """, (user_id, session_type, difficulty, topic))
+        session_id = cursor.lastrowid
     return session_id
 
 
 def get_session(session_id: int) -> Optional[dict]:
     """Get a session by ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM interview_sessions WHERE id = ?", (session_id,))
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        result = dict(row)
-        result["feedback"] = json.loads(result.get("feedback_json", "{}") or "{}")
-        return result
-    return None
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM interview_sessions WHERE id = ?", (session_id,))
+        row = cursor.fetchone()
+    return _session_row(row) if row else None
+
+
+def _session_row(row) -> dict:
+    """Convert an interview_sessions row, decoding its feedback JSON."""
+    result = dict(row)
+    feedback = _json_loads(result.get("feedback_json", "{}") or "{}")
+    result["feedback"] = feedback if isinstance(feedback, dict) else {}
+    return result
 
 
 def update_session_scores(session_id: int, overall: float, technical: float,
                           communication: float, reasoning: float,
                           problem_solving: float, feedback: dict):
     """Update session scores and feedback."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE interview_sessions
-        SET overall_score = ?, technical_score = ?, communication_score = ?,
-            reasoning_score = ?, problem_solving_score = ?, feedback_json = ?,
-            status = 'completed', ended_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    """, (overall, technical, communication, reasoning, problem_solving,
-          json.dumps(feedback), session_id))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            UPDATE interview_sessions
+            SET overall_score = ?, technical_score = ?, communication_score = ?,
+                reasoning_score = ?, problem_solving_score = ?, feedback_json = ?,
+                status = 'completed', ended_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (overall, technical, communication, reasoning, problem_solving,
+              _json_dumps(feedback), session_id))
 
 
 def complete_session(session_id: int):
     """Mark a session as completed."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE interview_sessions SET status = 'completed', ended_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    """, (session_id,))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            UPDATE interview_sessions SET status = 'completed', ended_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (session_id,))
 
 
 def get_user_sessions(user_id: int, limit: int = 50) -> list:
     """Get all sessions for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM interview_sessions WHERE user_id = ?
-        ORDER BY started_at DESC LIMIT ?
-    """, (user_id, limit))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM interview_sessions WHERE user_id = ?
+            ORDER BY started_at DESC LIMIT ?
+        """, (user_id, limit))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
 def increment_tab_violations(session_id: int, violation_type: str = "tab_switch",
                              details: str = ""):
     """Record a tab violation."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO tab_violations (session_id, violation_type, details)
-        VALUES (?, ?, ?)
-    """, (session_id, violation_type, details))
-    cursor.execute("""
-        UPDATE interview_sessions SET tab_violations = tab_violations + 1
-        WHERE id = ?
-    """, (session_id,))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO tab_violations (session_id, violation_type, details)
+            VALUES (?, ?, ?)
+        """, (session_id, violation_type, details))
+        cursor.execute("""
+            UPDATE interview_sessions SET tab_violations = tab_violations + 1
+            WHERE id = ?
+        """, (session_id,))
+
+
+def add_tab_violations(session_id: int, violation_type: str, delta: int,
+                       details: str = ""):
+    """Record `delta` violations of one type in a single transaction."""
+    if delta <= 0:
+        return
+    with _cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO tab_violations (session_id, violation_type, details)
+            VALUES (?, ?, ?)
+        """, [(session_id, violation_type, details)] * delta)
+        cursor.execute("""
+            UPDATE interview_sessions SET tab_violations = tab_violations + ?
+            WHERE id = ?
+        """, (delta, session_id))
 
 
 def get_tab_violations(session_id: int) -> list:
     """Get all tab violations for a session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM tab_violations WHERE session_id = ? ORDER BY violation_time
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM tab_violations WHERE session_id = ? ORDER BY violation_time
+        """, (session_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
@@ -578,61 +592,73 @@ def get_tab_violations(session_id: int) -> list:
 def save_question(session_id: int, question_number: int, question_text: str,
                   question_type: str = "coding", difficulty: str = "medium") -> int:
     """Save an interview question."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO interview_questions
-        (session_id, question_number, question_text, question_type, difficulty)
-        VALUES (?, ?, ?, ?, ?)
-    """, (session_id, question_number, question_text, question_type, difficulty))
-    conn.commit()
-    qid = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO interview_questions
+            (session_id, question_number, question_text, question_type, difficulty)
+            VALUES (?, ?, ?, ?, ?)
+        """, (session_id, question_number, question_text, question_type, difficulty))
+        qid = cursor.lastrowid
     return qid
 
 
+def bulk_save_questions(session_id: int, question_texts: list,
+                        question_type: str = "coding", difficulty: str = "medium"):
+    """Save a session's questions, numbered from 1, in a single transaction."""
+    with _cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO interview_questions
+            (session_id, question_number, question_text, question_type, difficulty)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(session_id, i, text, question_type, difficulty)
+              for i, text in enumerate(question_texts, 1)])
+
+
 def update_question_response(question_id: int, candidate_response_text: str = None,
                              candidate_code: str = None, voice_transcript: str = None,
-                             ai_analysis: str = None, code_correctness_score: float = 0,
+                             ai_analysis: dict = None, code_correctness_score: float = 0,
                              approach_score: float = 0, communication_score: float = 0,
                              follow_up_questions: list = None,
                              suggested_solutions: list = None):
     """Update a question with candidate's response and AI analysis."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE interview_questions
-        SET candidate_response_text = ?, candidate_code = ?, voice_transcript = ?,
-            ai_analysis = ?, code_correctness_score = ?, approach_score = ?,
-            communication_score = ?, follow_up_questions_json = ?,
-            suggested_solutions_json = ?
-        WHERE id = ?
-    """, (candidate_response_text, candidate_code, voice_transcript,
-          ai_analysis, code_correctness_score, approach_score, communication_score,
-          json.dumps(follow_up_questions or []),
-          json.dumps(suggested_solutions or []),
-          question_id))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            UPDATE interview_questions
+            SET candidate_response_text = ?, candidate_code = ?, voice_transcript = ?,
+                ai_analysis = ?, code_correctness_score = ?, approach_score = ?,
+                communication_score = ?, follow_up_questions_json = ?,
+                suggested_solutions_json = ?
+            WHERE id = ?
+        """, (candidate_response_text, candidate_code, voice_transcript,
+              _json_dumps(ai_analysis) if ai_analysis is not None else None,
+              code_correctness_score, approach_score, communication_score,
+              _json_dumps(follow_up_questions or []),
+              _json_dumps(suggested_solutions or []),
+              question_id))
 
 
 def get_session_questions(session_id: int) -> list:
     """Get all questions for a session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM interview_questions WHERE session_id = ?
-        ORDER BY question_number
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    results = []
-    for r in rows:
-        d = dict(r)
-        d["follow_up_questions"] = json.loads(d.get("follow_up_questions_json", "[]") or "[]")
-        d["suggested_solutions"] = json.loads(d.get("suggested_solutions_json", "[]") or "[]")
-        results.append(d)
-    return results
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM interview_questions WHERE session_id = ?
+            ORDER BY question_number
+        """, (session_id,))
+        rows = cursor.fetchall()
+    return [_question_row(r) for r in rows]
+
+
+def _question_row(row) -> dict:
+    """Convert an interview_questions row, decoding its JSON columns."""
+    d = dict(row)
+    d["follow_up_questions"] = _json_loads(d.get("follow_up_questions_json", "[]") or "[]")
+    d["suggested_solutions"] = _json_loads(d.get("suggested_solutions_json", "[]") or "[]")
+    try:
+        analysis = _json_loads(d["ai_analysis"]) if d.get("ai_analysis") else {}
+    except (ValueError, TypeError):
+        analysis = {}
+    d["analysis"] = analysis if isinstance(analysis, dict) else {}
+    return d
 
 
 # ---- Chat Message Operations ----
@@ -640,28 +666,23 @@ def get_session_questions(session_id: int) -> list:
 def save_chat_message(session_id: int, role: str, content: str,
                       message_type: str = "text") -> int:
     """Save a chat message."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO chat_messages (session_id, role, content, message_type)
-        VALUES (?, ?, ?, ?)
-    """, (session_id, role, content, message_type))
-    conn.commit()
-    msg_id = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO chat_messages (session_id, role, content, message_type)
+            VALUES (?, ?, ?, ?)
+        """, (session_id, role, content, message_type))
+        msg_id = cursor.lastrowid
     return msg_id
 
 
 def get_chat_messages(session_id: int) -> list:
     """Get all chat messages for a session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM chat_messages WHERE session_id = ?
-        ORDER BY timestamp
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM chat_messages WHERE session_id = ?
+            ORDER BY timestamp
+        """, (session_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
@@ -669,52 +690,48 @@ def get_chat_messages(session_id: int) -> list:
 
 def get_user_analytics(user_id: int) -> dict:
     """Get analytics data for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with _cursor() as cursor:
+        # Total sessions
+        cursor.execute("""
+            SELECT COUNT(*) as total,
+                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
+                   AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_overall,
+                   AVG(CASE WHEN status = 'completed' THEN technical_score END) as avg_technical,
+                   AVG(CASE WHEN status = 'completed' THEN communication_score END) as avg_communication,
+                   AVG(CASE WHEN status = 'completed' THEN reasoning_score END) as avg_reasoning,
+                   AVG(CASE WHEN status = 'completed' THEN problem_solving_score END) as avg_problem_solving,
+                   SUM(tab_violations) as total_violations
+            FROM interview_sessions WHERE user_id = ?
+        """, (user_id,))
+        stats = dict(cursor.fetchone())
+
+        # Sessions by type
+        cursor.execute("""
+            SELECT session_type, COUNT(*) as count,
+                   AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_score
+            FROM interview_sessions WHERE user_id = ?
+            GROUP BY session_type
+        """, (user_id,))
+        by_type = [dict(r) for r in cursor.fetchall()]
 
-    # Total sessions
-    cursor.execute("""
-        SELECT COUNT(*) as total,
-               SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-               AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_overall,
-               AVG(CASE WHEN status = 'completed' THEN technical_score END) as avg_technical,
-               AVG(CASE WHEN status = 'completed' THEN communication_score END) as avg_communication,
-               AVG(CASE WHEN status = 'completed' THEN reasoning_score END) as avg_reasoning,
-               AVG(CASE WHEN status = 'completed' THEN problem_solving_score END) as avg_problem_solving,
-               SUM(tab_violations) as total_violations
-        FROM interview_sessions WHERE user_id = ?
-    """, (user_id,))
-    stats = dict(cursor.fetchone())
-
-    # Sessions by type
-    cursor.execute("""
-        SELECT session_type, COUNT(*) as count,
-               AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_score
-        FROM interview_sessions WHERE user_id = ?
-        GROUP BY session_type
-    """, (user_id,))
-    by_type = [dict(r) for r in cursor.fetchall()]
-
-    # Score trend over time
-    cursor.execute("""
-        SELECT id, session_type, overall_score, technical_score,
-               communication_score, started_at
-        FROM interview_sessions
-        WHERE user_id = ? AND status = 'completed'
-        ORDER BY started_at
-    """, (user_id,))
-    trend = [dict(r) for r in cursor.fetchall()]
-
-    # Sessions by difficulty
-    cursor.execute("""
-        SELECT difficulty, COUNT(*) as count,
-               AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_score
-        FROM interview_sessions WHERE user_id = ?
-        GROUP BY difficulty
-    """, (user_id,))
-    by_difficulty = [dict(r) for r in cursor.fetchall()]
-
-    conn.close()
+        # Score trend over time
+        cursor.execute("""
+            SELECT id, session_type, overall_score, technical_score,
+                   communication_score, started_at
+            FROM interview_sessions
+            WHERE user_id = ? AND status = 'completed'
+            ORDER BY started_at
+        """, (user_id,))
+        trend = [dict(r) for r in cursor.fetchall()]
+
+        # Sessions by difficulty
+        cursor.execute("""
+            SELECT difficulty, COUNT(*) as count,
+                   AVG(CASE WHEN status = 'completed' THEN overall_score END) as avg_score
+            FROM interview_sessions WHERE user_id = ?
+            GROUP BY difficulty
+        """, (user_id,))
+        by_difficulty = [dict(r) for r in cursor.fetchall()]
 
     return {
         "stats": stats,
@@ -728,82 +745,120 @@ def get_user_analytics(user_id: int) -> dict:
 
 def save_recording_event(session_id: int, event_type: str, event_data: dict) -> int:
     """Save an interview recording event (code snapshot, conversation, etc.)."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO interview_recordings (session_id, event_type, event_data)
-        VALUES (?, ?, ?)
-    """, (session_id, event_type, json.dumps(event_data)))
-    conn.commit()
-    event_id = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO interview_recordings (session_id, event_type, event_data)
+            VALUES (?, ?, ?)
+        """, (session_id, event_type, _json_dumps(event_data)))
+        event_id = cursor.lastrowid
     return event_id
 
 
+def bulk_save_events(session_id: int, events: list, chat_messages: list = None):
+    """Save recording events and chat messages in a single transaction.
+
+    events is a list of (event_type, event_data) pairs and chat_messages a
+    list of (role, content) pairs.
+    """
+    with _cursor() as cursor:
+        if chat_messages:
+            cursor.executemany("""
+                INSERT INTO chat_messages (session_id, role, content)
+                VALUES (?, ?, ?)
+            """, [(session_id, role, content) for role, content in chat_messages])
+        cursor.executemany("""
+            INSERT INTO interview_recordings (session_id, event_type, event_data)
+            VALUES (?, ?, ?)
+        """, [(session_id, event_type, _json_dumps(event_data))
+              for event_type, event_data in events])
+
+
 def get_recording_events(session_id: int) -> list:
     """Get all recording events for a session in chronological order."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM interview_recordings WHERE session_id = ?
-        ORDER BY timestamp ASC
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    results = []
-    for r in rows:
-        d = dict(r)
-        d["event_data"] = json.loads(d.get("event_data", "{}") or "{}")
-        results.append(d)
-    return results
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM interview_recordings WHERE session_id = ?
+            ORDER BY timestamp ASC
+        """, (session_id,))
+        rows = cursor.fetchall()
+    return [_recording_row(r) for r in rows]
+
+
+def _recording_row(row) -> dict:
+    """Convert an interview_recordings row, decoding its event data."""
+    d = dict(row)
+    d["event_data"] = _json_loads(d.get("event_data", "{}") or "{}")
+    return d
 
 
 # ---- User Memory Operations ----
 
+# Bumped by every memory write, so callers can cache data derived from a
+# user's memories and cheaply tell when it is stale
+_memory_versions = Counter()
+
+
+def user_memory_version(user_id: int) -> int:
+    """Current write counter for a user's memories (process-local)."""
+    return _memory_versions[user_id]
+
+
 def save_user_memory(user_id: int, memory_key: str, memory_value: str,
                      category: str = "general", source_session_id: int = None):
     """Save or update a user memory entry."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO user_memory (user_id, memory_key, memory_value, category, source_session_id)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(user_id, memory_key)
-        DO UPDATE SET memory_value = excluded.memory_value,
-                     updated_at = CURRENT_TIMESTAMP,
-                     source_session_id = excluded.source_session_id
-    """, (user_id, memory_key, memory_value, category, source_session_id))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO user_memory (user_id, memory_key, memory_value, category, source_session_id)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, memory_key)
+            DO UPDATE SET memory_value = excluded.memory_value,
+                         updated_at = CURRENT_TIMESTAMP,
+                         source_session_id = excluded.source_session_id
+        """, (user_id, memory_key, memory_value, category, source_session_id))
+    _memory_versions[user_id] += 1
+
+
+def bulk_save_user_memories(user_id: int, memories: list, source_session_id: int = None):
+    """Save or update several memory entries in a single transaction.
+
+    memories is a list of (memory_key, memory_value, category) tuples.
+    """
+    with _cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO user_memory (user_id, memory_key, memory_value, category, source_session_id)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, memory_key)
+            DO UPDATE SET memory_value = excluded.memory_value,
+                         updated_at = CURRENT_TIMESTAMP,
+                         source_session_id = excluded.source_session_id
+        """, [(user_id, key, value, category, source_session_id)
+              for key, value, category in memories])
+    _memory_versions[user_id] += 1
 
 
 def get_user_memories(user_id: int, category: str = None) -> list:
     """Get all memories for a user, optionally filtered by category."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    if category:
-        cursor.execute("""
-            SELECT * FROM user_memory WHERE user_id = ? AND category = ?
-            ORDER BY updated_at DESC
-        """, (user_id, category))
-    else:
-        cursor.execute("""
-            SELECT * FROM user_memory WHERE user_id = ? ORDER BY updated_at DESC
-        """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        if category:
+            cursor.execute("""
+                SELECT * FROM user_memory WHERE user_id = ? AND category = ?
+                ORDER BY updated_at DESC
+            """, (user_id, category))
+        else:
+            cursor.execute("""
+                SELECT * FROM user_memory WHERE user_id = ? ORDER BY updated_at DESC
+            """, (user_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
 def delete_user_memory(user_id: int, memory_key: str):
     """Delete a specific user memory."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        DELETE FROM user_memory WHERE user_id = ? AND memory_key = ?
-    """, (user_id, memory_key))
-    conn.commit()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            DELETE FROM user_memory WHERE user_id = ? AND memory_key = ?
+        """, (user_id, memory_key))
+    _memory_versions[user_id] += 1
 
 
 def get_user_memory_summary(user_id: int) -> str:
@@ -821,30 +876,132 @@ def get_user_memory_summary(user_id: int) -> str:
 
 def save_proctoring_violation(session_id: int, violation_type: str, detail: str = "") -> int:
     """Save a webcam proctoring violation."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO proctoring_violations (session_id, violation_type, detail)
-        VALUES (?, ?, ?)
-    """, (session_id, violation_type, detail))
-    conn.commit()
-    vid = cursor.lastrowid
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO proctoring_violations (session_id, violation_type, detail)
+            VALUES (?, ?, ?)
+        """, (session_id, violation_type, detail))
+        vid = cursor.lastrowid
     return vid
 
 
 def get_proctoring_violations(session_id: int) -> list:
     """Get all proctoring violations for a session."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM proctoring_violations WHERE session_id = ?
-        ORDER BY violation_time
-    """, (session_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM proctoring_violations WHERE session_id = ?
+            ORDER BY violation_time
+        """, (session_id,))
+        rows = cursor.fetchall()
     return [dict(r) for r in rows]
 
 
+# ---- Session Detail Operations ----
+
+def get_session_bundle(session_id: int) -> Optional[dict]:
+    """Get a session and all of its related rows in a single transaction.
+
+    Returns None if the session does not exist, otherwise a dict with
+    session, questions, chat_messages, tab_violations,
+    proctoring_violations and recording_events keys.
+    """
+    with _cursor() as cursor:
+        cursor.execute("SELECT * FROM interview_sessions WHERE id = ?", (session_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        def fetch(sql: str) -> list:
+            cursor.execute(sql, (session_id,))
+            return cursor.fetchall()
+
+        questions = fetch("""
+            SELECT * FROM interview_questions WHERE session_id = ?
+            ORDER BY question_number
+        """)
+        chat_messages = fetch("""
+            SELECT * FROM chat_messages WHERE session_id = ?
+            ORDER BY timestamp
+        """)
+        tab_violations = fetch("""
+            SELECT * FROM tab_violations WHERE session_id = ? ORDER BY violation_time
+        """)
+        proctoring_violations = fetch("""
+            SELECT * FROM proctoring_violations WHERE session_id = ?
+            ORDER BY violation_time
+        """)
+        recording_events = fetch("""
+            SELECT * FROM interview_recordings WHERE session_id = ?
+            ORDER BY timestamp ASC
+        """)
+    return {
+        "session": _session_row(row),
+        "questions": [_question_row(r) for r in questions],
+        "chat_messages": [dict(r) for r in chat_messages],
+        "tab_violations": [dict(r) for r in tab_violations],
+        "proctoring_violations": [dict(r) for r in proctoring_violations],
+        "recording_events": [_recording_row(r) for r in recording_events],
+    }
+
+
+# ---- Question Cache Operations ----
+
+def _skills_key(skills: list) -> str:
+    """Normalize a skill list into a sorted, comma-joined key."""
+    return ",".join(sorted({s.strip().lower() for s in skills or [] if s and s.strip()}))
+
+
+def cache_question(difficulty: str, topic: str, skills: list, question: dict):
+    """Store a generated DSA question for reuse by candidates with similar skills."""
+    with _cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO question_cache (difficulty, topic, skills_key, title, question_json)
+            VALUES (?, ?, ?, ?, ?)
+        """, (difficulty, topic, _skills_key(skills), question.get("title", ""),
+              _json_dumps(question)))
+
+
+def find_cached_question(user_id: int, difficulty: str, topic: str, skills: list,
+                         exclude_titles: list = None,
+                         min_similarity: float = 0.8,
+                         min_candidates: int = 5) -> Optional[dict]:
+    """Pick a cached question generated for a similar skill set.
+
+    Only questions with the same difficulty and topic are considered, minus
+    any the user was already asked in this or an earlier session.
+    Similarity is the Jaccard index of the two skill sets. Returns None
+    until at least min_candidates questions match, so the pool keeps
+    growing and repeat candidates are not all served the same few.
+    """
+    wanted = set(_skills_key(skills).split(",")) - {""}
+    excluded = set(exclude_titles or [])
+    with _cursor() as cursor:
+        cursor.execute("""
+            SELECT c.skills_key, c.title, c.question_json FROM question_cache c
+            WHERE c.difficulty = ? AND c.topic IS ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM interview_questions q
+                  JOIN interview_sessions s ON s.id = q.session_id
+                  WHERE s.user_id = ?
+                    AND substr(q.question_text, 1, length(c.title) + 1) = c.title || ':'
+              )
+            ORDER BY c.created_at DESC LIMIT 200
+        """, (difficulty, topic, user_id))
+        rows = cursor.fetchall()
+
+    matches = {}
+    for r in rows:
+        if r["title"] in excluded or r["title"] in matches:
+            continue
+        cached = set(r["skills_key"].split(",")) - {""}
+        union = wanted | cached
+        score = len(wanted & cached) / len(union) if union else 1.0
+        if score >= min_similarity:
+            matches[r["title"]] = r["question_json"]
+    if len(matches) < min_candidates:
+        return None
+    return _json_loads(secrets.choice(list(matches.values())))
+
+
 # Initialize the database on import
 init_db()
@@ -0,0 +1,43 @@
+"""Session state container for the DSA interview page."""
+
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(slots=True)
+class DSAState:
+    """All DSA interview state, kept under a single session_state key.
+
+    The conversation is stored as parallel role/content lists rather than
+    a list of per-message dicts.
+    """
+    session_id: Optional[int] = None
+    interview_active: bool = False
+    ending: bool = False
+    enable_voice: bool = True
+    total_questions: int = 3
+    question_number: int = 0
+    current_question: Optional[dict] = None
+    question_db_id: Optional[int] = None
+    questions_asked: list = field(default_factory=list)
+    current_analysis: Optional[dict] = None
+    last_ai_message: str = ""
+    memory_ctx: str = ""
+    voice_transcript: str = ""
+    speech_analysis: Optional[dict] = None
+    hint_idx: int = 0
+    next_q_future: Optional[Future] = None
+    transcribe_file_id: Optional[str] = None
+    transcribe_future: Optional[Future] = None
+    roles: list = field(default_factory=list)
+    contents: list = field(default_factory=list)
+
+    def add_message(self, role: str, content: str):
+        """Append a message to the conversation."""
+        self.roles.append(role)
+        self.contents.append(content)
+
+    def conversation(self) -> list:
+        """Return the conversation as role/content dicts for the AI helpers."""
+        return [{"role": r, "content": c} for r, c in zip(self.roles, self.contents)]
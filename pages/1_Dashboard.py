@@ -10,6 +10,11 @@ import auth_utils as auth
 
 load_dotenv()
 
+_METRIC_CARD = (
+    '<div class="metric-card"><div class="metric-value">{value}</div>'
+    '<div class="metric-label">{label}</div></div>'
+).format
+
 st.set_page_config(page_title="IntervueX – Dashboard", page_icon="📊", layout="wide")
 
 # Require authentication
@@ -43,6 +48,11 @@ st.markdown("""
         justify-content: center;
         align-items: center;
     }
+    .metric-grid {
+        display: grid;
+        grid-template-columns: repeat(6, minmax(0, 1fr));
+        gap: 1rem;
+    }
     .metric-card:hover {
         transform: translateY(-3px);
     }
@@ -67,15 +77,12 @@ if not st.session_state.get("user_id"):
     st.stop()
 
 user_id = st.session_state.user_id
-st.markdown("## 📊 Performance Analytics Dashboard")
-st.markdown("---")
+st.markdown("## 📊 Performance Analytics Dashboard\n\n---")
 
 analytics = db.get_user_analytics(user_id)
 stats = analytics["stats"]
 
 # Top-level metrics
-col1, col2, col3, col4, col5, col6 = st.columns(6)
-
 total = stats.get("total", 0) or 0
 completed = stats.get("completed", 0) or 0
 avg_overall = stats.get("avg_overall", 0) or 0
@@ -83,33 +90,28 @@ avg_tech = stats.get("avg_technical", 0) or 0
 avg_comm = stats.get("avg_communication", 0) or 0
 total_violations = stats.get("total_violations", 0) or 0
 
-with col1:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{total}</div>
-    <div class="metric-label">Total Sessions</div></div>""", unsafe_allow_html=True)
-with col2:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{completed}</div>
-    <div class="metric-label">Completed</div></div>""", unsafe_allow_html=True)
-with col3:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{avg_overall:.0f}</div>
-    <div class="metric-label">Avg Overall Score</div></div>""", unsafe_allow_html=True)
-with col4:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{avg_tech:.0f}</div>
-    <div class="metric-label">Avg Technical</div></div>""", unsafe_allow_html=True)
-with col5:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{avg_comm:.0f}</div>
-    <div class="metric-label">Avg Communication</div></div>""", unsafe_allow_html=True)
-with col6:
-    st.markdown(f"""<div class="metric-card"><div class="metric-value">{total_violations}</div>
-    <div class="metric-label">Tab Violations</div></div>""", unsafe_allow_html=True)
-
-st.markdown("---")
+metric_cards = (
+    (total, "Total Sessions"),
+    (completed, "Completed"),
+    (f"{avg_overall:.0f}", "Avg Overall Score"),
+    (f"{avg_tech:.0f}", "Avg Technical"),
+    (f"{avg_comm:.0f}", "Avg Communication"),
+    (total_violations, "Tab Violations"),
+)
+st.markdown(
+    '<div class="metric-grid">'
+    + "".join(_METRIC_CARD(value=value, label=label) for value, label in metric_cards)
+    + "</div>",
+    unsafe_allow_html=True,
+)
 
 if not analytics["trend"]:
+    st.markdown("---")
     st.info("Complete some interview sessions to see your performance analytics here!")
     st.stop()
 
 # Score Trend Chart
-st.markdown("### 📈 Score Trend Over Time")
+st.markdown("---\n\n### 📈 Score Trend Over Time")
 trend_data = analytics["trend"]
 if trend_data:
     df_trend = pd.DataFrame(trend_data)
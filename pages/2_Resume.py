@@ -55,8 +55,9 @@ if uploaded_file is not None:
                     summary=result.get("summary", "")
                 )
 
+                # The analysis section below reads the latest resume later in
+                # this same run, so no rerun is needed to show the new data.
                 st.success("Resume analyzed and saved successfully!")
-                st.rerun()
             except Exception as e:
                 st.error(f"Error analyzing resume: {e}")
                 st.info("Please ensure your GROQ_API_KEY is set correctly in the .env file for AI-based resume analysis.")
@@ -1,22 +1,13 @@
 """DSA Interview Simulation page with voice AI agent."""
 
 import streamlit as st
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 import database as db
 import auth_utils as auth
-from ai_engine import (
-    generate_dsa_question,
-    analyze_candidate_response,
-    generate_interviewer_response,
-    generate_final_report,
-)
-from voice_handler import transcribe_audio, analyze_speech_patterns, synthesize_speech, get_browser_stt_component
 import streamlit.components.v1 as components
-from browser_lock import inject_browser_lock
-from webcam_proctor import inject_webcam_proctor
-from user_memory import extract_memories_from_conversation, extract_memories_with_ai, get_memory_context_for_ai
+from interview_state import DSAState
 
 load_dotenv()
 
@@ -28,90 +19,119 @@ auth.require_auth()
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from ui_utils import apply_global_css
+from ui_utils import apply_global_css, render_chat_message
 apply_global_css()
 
-# Custom CSS for interview page
-st.markdown("""
-<style>
-    .interviewer-msg {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid rgba(128, 128, 128, 0.2);
-        border-left: 4px solid #818CF8;
-        padding: 16px 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-    }
-    .candidate-msg {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid rgba(128, 128, 128, 0.2);
-        border-left: 4px solid #34D399;
-        padding: 16px 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-    }
-    .system-msg {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid rgba(128, 128, 128, 0.2);
-        border-left: 4px solid #F472B6;
-        padding: 12px 16px;
-        border-radius: 12px;
-        margin: 8px 0;
-        font-size: 0.9rem;
-        opacity: 0.9;
-    }
-    .question-card {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid #4F46E5;
-        border-radius: 16px;
-        padding: 24px;
-        margin: 15px 0;
-    }
-    .score-badge {
-        display: inline-block;
-        padding: 4px 12px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 0.85rem;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 if not st.session_state.get("user_id"):
     st.warning("Please sign in from the home page to start an interview.")
     st.stop()
 
 user_id = st.session_state.user_id
 
+
+def _show_conversation(container, state: DSAState):
+    """Render the whole conversation into container with one markdown call."""
+    if state.roles:
+        container.markdown("\n\n".join(map(render_chat_message, state.roles, state.contents)),
+                           unsafe_allow_html=True)
+
+
+@st.cache_resource
+def _background_executor() -> ThreadPoolExecutor:
+    """Worker pool shared across reruns for prefetching, transcription and memory extraction."""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def _get_dsa_question(user_id: int, skills: list, difficulty: str, topic: str,
+                      previous_questions: list, user_memory_context: str = "") -> dict:
+    """Reuse a question cached for a similar skill set, or generate one.
+
+    Only questions generated without memory context are cached, since the
+    others were tailored to one candidate's history.
+    """
+    from ai_engine import generate_dsa_question
+
+    cached = db.find_cached_question(user_id, difficulty, topic, skills,
+                                     exclude_titles=previous_questions)
+    if cached:
+        return cached
+    question = generate_dsa_question(
+        skills=skills,
+        difficulty=difficulty,
+        topic=topic,
+        previous_questions=previous_questions,
+        user_memory_context=user_memory_context,
+    )
+    if not question.get("is_fallback") and not user_memory_context:
+        db.cache_question(difficulty, topic, skills, question)
+    return question
+
+
+@st.fragment
+def _voice_panel(state: DSAState):
+    """Voice and browser speech-to-text inputs.
+
+    Runs as a fragment, so recording and transcribing rerun only this
+    panel; the transcript reaches the submit handler through state.
+    """
+    from voice_handler import transcribe_audio, analyze_speech_patterns, get_browser_stt_component
+
+    voice_tab, stt_tab = st.tabs(["🎙️ Voice Explanation", "🗣️ Browser Speech-to-Text"])
+
+    with voice_tab:
+        if state.enable_voice:
+            st.markdown("Record your verbal explanation of your approach:")
+            audio_data = st.audio_input("🎙️ Record your explanation", key="voice_input")
+
+            if audio_data is not None:
+                st.audio(audio_data)
+                # Upload to Deepgram as soon as a recording lands, so the
+                # transcript is usually ready by the time the button is clicked
+                if state.transcribe_file_id != audio_data.file_id:
+                    state.transcribe_file_id = audio_data.file_id
+                    state.transcribe_future = _background_executor().submit(
+                        transcribe_audio, audio_data, "audio/wav"
+                    )
+                if st.button("📝 Transcribe Audio", key="transcribe_btn"):
+                    with st.spinner("Transcribing with Deepgram..."):
+                        result = state.transcribe_future.result()
+
+                        if result.get("error"):
+                            st.error(f"Transcription error: {result['error']}")
+                        else:
+                            state.voice_transcript = result.get("transcript", "")
+                            speech_analysis = analyze_speech_patterns(result.get("words", []))
+                            state.speech_analysis = speech_analysis
+
+                            st.success("Transcription complete!")
+                            st.markdown(f"**Transcript:** {result['transcript']}")
+
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("Speaking Pace", f"{speech_analysis['speaking_pace_wpm']} WPM")
+                            with col2:
+                                st.metric("Filler Words", speech_analysis["filler_word_count"])
+                            with col3:
+                                st.metric("Pauses", speech_analysis["pause_count"])
+
+                if state.voice_transcript:
+                    st.info(f"Current transcript: {state.voice_transcript}")
+        else:
+            st.info("Voice recording is disabled for this session.")
+
+    with stt_tab:
+        st.markdown("Use your browser's built-in speech recognition (Chrome/Edge recommended):")
+        components.html(get_browser_stt_component(), height=200)
+        st.markdown("""<p style='font-size:0.85rem;color:#6B7280;'>After speaking, the transcript is saved automatically.
+        Copy it to the Text Response tab or it will be included when you submit.</p>""", unsafe_allow_html=True)
+
+
 # Initialize interview session state
-if "dsa_session_id" not in st.session_state:
-    st.session_state.dsa_session_id = None
-if "dsa_current_question" not in st.session_state:
-    st.session_state.dsa_current_question = None
-if "dsa_question_number" not in st.session_state:
-    st.session_state.dsa_question_number = 0
-if "dsa_conversation" not in st.session_state:
-    st.session_state.dsa_conversation = []
-if "dsa_questions_asked" not in st.session_state:
-    st.session_state.dsa_questions_asked = []
-if "dsa_current_analysis" not in st.session_state:
-    st.session_state.dsa_current_analysis = None
-if "dsa_interview_active" not in st.session_state:
-    st.session_state.dsa_interview_active = False
-if "dsa_question_db_id" not in st.session_state:
-    st.session_state.dsa_question_db_id = None
-if "dsa_total_questions" not in st.session_state:
-    st.session_state.dsa_total_questions = 3
-if "dsa_last_ai_message" not in st.session_state:
-    st.session_state.dsa_last_ai_message = ""
+dsa = st.session_state.setdefault("dsa", DSAState())
 
 st.markdown("## 💻 DSA Interview Simulation")
 
-if not st.session_state.dsa_interview_active:
+if not dsa.interview_active:
     # Interview setup
     st.markdown("### Configure Your Interview")
 
@@ -164,44 +184,57 @@ if not st.session_state.dsa_interview_active:
                 difficulty=difficulty,
                 topic=topic,
             )
-            st.session_state.dsa_session_id = session_id
-            st.session_state.dsa_interview_active = True
-            st.session_state.dsa_question_number = 0
-            st.session_state.dsa_conversation = []
-            st.session_state.dsa_questions_asked = []
-            st.session_state.dsa_total_questions = num_questions
-            st.session_state.dsa_enable_voice = enable_voice
+            st.session_state.dsa = DSAState(
+                session_id=session_id,
+                interview_active=True,
+                total_questions=num_questions,
+                enable_voice=enable_voice,
+            )
             st.rerun()
 
 else:
-    # Active interview
-    session_id = st.session_state.dsa_session_id
+    # Active interview. The LLM, voice and proctoring modules are imported
+    # here so the setup screen renders without loading them.
+    from ai_engine import (
+        analyze_candidate_response,
+        generate_interviewer_response,
+        generate_final_report,
+    )
+    from voice_handler import synthesize_speech
+    from browser_lock import inject_browser_lock
+    from webcam_proctor import inject_webcam_proctor
+    from user_memory import extract_memories_from_conversation, extract_memories_with_ai, get_memory_context_for_ai
+
+    session_id = dsa.session_id
 
     # Inject browser lock and webcam proctoring
     inject_browser_lock(session_id)
     inject_webcam_proctor(session_id)
 
+    # Fetched once per rerun, after the proctor has synced any violations,
+    # and shared by every branch below
+    session_data = db.get_session(session_id) or {}
+
     # Top bar with session info
     col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     with col1:
-        st.markdown(f"**Session #{session_id}** | Question {st.session_state.dsa_question_number + 1} of {st.session_state.dsa_total_questions}")
+        st.markdown(f"**Session #{session_id}** | Question {dsa.question_number + 1} of {dsa.total_questions}")
     with col2:
-        session = db.get_session(session_id)
-        st.markdown(f"**Difficulty:** {session['difficulty'].title() if session else 'N/A'}")
+        st.markdown(f"**Difficulty:** {session_data.get('difficulty', 'N/A').title()}")
     with col3:
-        violations = session.get("tab_violations", 0) if session else 0
+        violations = session_data.get("tab_violations", 0)
         if violations > 0:
             st.error(f"⚠️ Violations: {violations}")
         else:
             st.success("✅ No violations")
     with col4:
         if st.button("🛑 End Interview", type="secondary"):
-            st.session_state.dsa_ending = True
+            dsa.ending = True
 
     st.markdown("---")
 
     # Handle end interview
-    if st.session_state.get("dsa_ending"):
+    if dsa.ending:
         st.warning("Are you sure you want to end the interview?")
         col1, col2 = st.columns(2)
         with col1:
@@ -210,11 +243,10 @@ else:
                 with st.spinner("Generating final report..."):
                     try:
                         questions = db.get_session_questions(session_id)
-                        session_data = db.get_session(session_id)
                         report = generate_final_report(
                             questions,
                             "dsa",
-                            session_data.get("tab_violations", 0) if session_data else 0
+                            session_data.get("tab_violations", 0)
                         )
 
                         db.update_session_scores(
@@ -230,35 +262,32 @@ else:
                         st.warning(f"Could not generate AI report: {e}")
                         db.complete_session(session_id)
 
-                # Extract memories from the full conversation
-                try:
-                    extract_memories_with_ai(user_id, session_id, st.session_state.dsa_conversation)
-                except Exception:
-                    pass  # Memory extraction is best-effort
+                # Extract memories from the full conversation in the
+                # background; it is best-effort and should not delay the report
+                _background_executor().submit(extract_memories_with_ai, user_id, session_id, dsa.conversation())
 
                 # Reset state
-                st.session_state.dsa_interview_active = False
-                st.session_state.dsa_ending = False
+                dsa.interview_active = False
+                dsa.ending = False
                 st.session_state.view_session_id = session_id
                 st.switch_page("pages/5_History.py")
         with col2:
             if st.button("No, Continue"):
-                st.session_state.dsa_ending = False
+                dsa.ending = False
                 st.rerun()
         st.stop()
 
     # Generate new question if needed
-    if st.session_state.dsa_current_question is None:
-        if st.session_state.dsa_question_number >= st.session_state.dsa_total_questions:
+    if dsa.current_question is None:
+        if dsa.question_number >= dsa.total_questions:
             # All questions done, generate report
             with st.spinner("Generating final interview report..."):
                 try:
                     questions = db.get_session_questions(session_id)
-                    session_data = db.get_session(session_id)
                     report = generate_final_report(
                         questions,
                         "dsa",
-                        session_data.get("tab_violations", 0) if session_data else 0
+                        session_data.get("tab_violations", 0)
                     )
 
                     db.update_session_scores(
@@ -274,32 +303,40 @@ else:
                     st.warning(f"Could not generate AI report: {e}")
                     db.complete_session(session_id)
 
-            # Extract memories from the full conversation
-            try:
-                extract_memories_with_ai(user_id, session_id, st.session_state.dsa_conversation)
-            except Exception:
-                pass
+            # Extract memories from the full conversation in the background
+            _background_executor().submit(extract_memories_with_ai, user_id, session_id, dsa.conversation())
 
-            st.session_state.dsa_interview_active = False
+            dsa.interview_active = False
             st.session_state.view_session_id = session_id
             st.switch_page("pages/5_History.py")
 
         with st.spinner("AI Interviewer is preparing the next question..."):
             resume = db.get_latest_resume(user_id)
             skills = resume.get("skills", []) if resume else []
-            session_data = db.get_session(session_id)
 
             try:
-                # Get user memory context for personalized AI
+                # Get user memory context for personalized AI, reused for
+                # every LLM call on this question
                 memory_ctx = get_memory_context_for_ai(user_id)
-
-                question = generate_dsa_question(
-                    skills=skills,
-                    difficulty=session_data.get("difficulty", "medium") if session_data else "medium",
-                    topic=session_data.get("topic") if session_data else None,
-                    previous_questions=st.session_state.dsa_questions_asked,
-                    user_memory_context=memory_ctx,
-                )
+                dsa.memory_ctx = memory_ctx
+
+                question_kwargs = {
+                    "user_id": user_id,
+                    "skills": skills,
+                    "difficulty": session_data.get("difficulty", "medium"),
+                    "topic": session_data.get("topic"),
+                    "user_memory_context": memory_ctx,
+                }
+                # Use the question prefetched while the previous one was being
+                # answered; waiting on it is never slower than starting over
+                next_q_future, dsa.next_q_future = dsa.next_q_future, None
+                if next_q_future is not None:
+                    question = next_q_future.result()
+                else:
+                    question = _get_dsa_question(
+                        previous_questions=dsa.questions_asked,
+                        **question_kwargs,
+                    )
             except Exception as e:
                 st.warning(f"AI question generation unavailable ({e}). Using fallback question.")
                 question = {
@@ -311,34 +348,39 @@ else:
                     "expected_approach": "Hash map for O(n) lookup",
                     "time_complexity": "O(n)", "space_complexity": "O(n)",
                     "topic_tags": ["Array", "Hash Table"],
-                    "difficulty": session_data.get("difficulty", "medium") if session_data else "medium",
+                    "difficulty": session_data.get("difficulty", "medium"),
                     "starter_code_python": "def twoSum(nums: list[int], target: int) -> list[int]:\n    # Your code here\n    pass"
                 }
+                question_kwargs = None
+
+            dsa.current_question = question
+            dsa.questions_asked.append(question.get("title", ""))
 
-            st.session_state.dsa_current_question = question
-            st.session_state.dsa_questions_asked.append(question.get("title", ""))
+            # Start generating the next question while this one is answered
+            if question_kwargs and dsa.question_number + 1 < dsa.total_questions:
+                dsa.next_q_future = _background_executor().submit(
+                    _get_dsa_question,
+                    previous_questions=list(dsa.questions_asked),
+                    **question_kwargs,
+                )
 
             # Save question to DB
             qid = db.save_question(
                 session_id=session_id,
-                question_number=st.session_state.dsa_question_number + 1,
+                question_number=dsa.question_number + 1,
                 question_text=f"{question.get('title', '')}: {question.get('description', '')}",
                 question_type="coding",
                 difficulty=question.get("difficulty", "medium"),
             )
-            st.session_state.dsa_question_db_id = qid
+            dsa.question_db_id = qid
 
             # Add to conversation
-            intro_msg = f"**Question {st.session_state.dsa_question_number + 1}: {question.get('title', '')}**\n\n{question.get('description', '')}"
-            st.session_state.dsa_conversation.append({
-                "role": "interviewer",
-                "content": intro_msg
-            })
+            intro_msg = f"**Question {dsa.question_number + 1}: {question.get('title', '')}**\n\n{question.get('description', '')}"
+            dsa.add_message("interviewer", intro_msg)
             db.save_chat_message(session_id, "interviewer", intro_msg)
 
-            st.rerun()
-
-    question = st.session_state.dsa_current_question
+    # A freshly generated question falls through and renders in this run
+    question = dsa.current_question
 
     # Display question
     st.markdown(f"""
@@ -376,19 +418,11 @@ else:
 
     # Conversation history
     st.markdown("### 💬 Interview Conversation")
-    for msg in st.session_state.dsa_conversation:
-        if msg["role"] == "interviewer":
-            st.markdown(f'<div class="interviewer-msg">🤖 <strong>Interviewer:</strong><br>{msg["content"]}</div>',
-                        unsafe_allow_html=True)
-        elif msg["role"] == "candidate":
-            st.markdown(f'<div class="candidate-msg">👤 <strong>You:</strong><br>{msg["content"]}</div>',
-                        unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="system-msg">ℹ️ {msg["content"]}</div>',
-                        unsafe_allow_html=True)
+    conversation_box = st.empty()
+    _show_conversation(conversation_box, dsa)
 
     # Optional: play the latest interviewer message via TTS
-    last_ai = st.session_state.get("dsa_last_ai_message", "")
+    last_ai = dsa.last_ai_message
     if last_ai:
         if st.button("🔊 Listen to last interviewer message"):
             with st.spinner("Generating audio..."):
@@ -403,214 +437,176 @@ else:
     # Response section
     st.markdown("### ✍️ Your Response")
 
-    tab1, tab2, tab3, tab4 = st.tabs(["💻 Code Editor", "🎙️ Voice Explanation", "🗣️ Browser Speech-to-Text", "💬 Text Response"])
-
-    with tab1:
-        starter_code = question.get("starter_code_python", "def solution():\n    # Your code here\n    pass")
-        code_response = st.text_area(
-            "Write your solution here:",
-            value=starter_code,
-            height=300,
-            key="code_editor",
-        )
-
-    with tab2:
-        if st.session_state.get("dsa_enable_voice", True):
-            st.markdown("Record your verbal explanation of your approach:")
-            audio_data = st.audio_input("🎙️ Record your explanation", key="voice_input")
-
-            if audio_data is not None:
-                st.audio(audio_data)
-                if st.button("📝 Transcribe Audio", key="transcribe_btn"):
-                    with st.spinner("Transcribing with Deepgram..."):
-                        audio_bytes = audio_data.read()
-                        result = transcribe_audio(audio_bytes, "audio/wav")
-
-                        if result.get("error"):
-                            st.error(f"Transcription error: {result['error']}")
-                        else:
-                            st.session_state.dsa_voice_transcript = result.get("transcript", "")
-                            speech_analysis = analyze_speech_patterns(result.get("words", []))
-                            st.session_state.dsa_speech_analysis = speech_analysis
-
-                            st.success("Transcription complete!")
-                            st.markdown(f"**Transcript:** {result['transcript']}")
+    # Voice input stays outside the form so transcription updates live
+    _voice_panel(dsa)
+
+    # Typed answers only reach the script when the form is submitted,
+    # so editing code does not rerun the whole page
+    with st.form("dsa_submit_form", clear_on_submit=False):
+        code_tab, text_tab = st.tabs(["💻 Code Editor", "💬 Text Response"])
+
+        with code_tab:
+            starter_code = question.get("starter_code_python", "def solution():\n    # Your code here\n    pass")
+            code_response = st.text_area(
+                "Write your solution here:",
+                value=starter_code,
+                height=300,
+                key="code_editor",
+            )
 
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Speaking Pace", f"{speech_analysis['speaking_pace_wpm']} WPM")
-                            with col2:
-                                st.metric("Filler Words", speech_analysis["filler_word_count"])
-                            with col3:
-                                st.metric("Pauses", speech_analysis["pause_count"])
+        with text_tab:
+            text_response = st.text_area(
+                "Type your explanation here (alternative to voice):",
+                height=150,
+                key="text_response",
+                placeholder="Explain your approach, time complexity, and any trade-offs..."
+            )
 
-                if st.session_state.get("dsa_voice_transcript"):
-                    st.info(f"Current transcript: {st.session_state.dsa_voice_transcript}")
+        submitted = st.form_submit_button("📤 Submit Response & Get Feedback",
+                                          use_container_width=True, type="primary")
+
+    if submitted:
+        # The form widgets return their submitted values directly, so the
+        # handler works on locals instead of re-reading session state
+        voice_transcript = dsa.voice_transcript
+        text_resp = text_response or ""
+        code = code_response or ""
+        question_number = dsa.question_number + 1
+
+        # Combine voice and text responses
+        combined_explanation = ""
+        if voice_transcript:
+            combined_explanation += f"[Voice]: {voice_transcript}\n"
+        if text_resp:
+            combined_explanation += f"[Text]: {text_resp}"
+
+        if not combined_explanation.strip() and not code.strip():
+            st.error("Please provide at least a code solution or an explanation.")
         else:
-            st.info("Voice recording is disabled for this session.")
-
-    with tab3:
-        st.markdown("Use your browser's built-in speech recognition (Chrome/Edge recommended):")
-        components.html(get_browser_stt_component(), height=200)
-        st.markdown("""<p style='font-size:0.85rem;color:#6B7280;'>After speaking, the transcript is saved automatically.
-        Copy it to the Text Response tab or it will be included when you submit.</p>""", unsafe_allow_html=True)
-
-    with tab4:
-        text_response = st.text_area(
-            "Type your explanation here (alternative to voice):",
-            height=150,
-            key="text_response",
-            placeholder="Explain your approach, time complexity, and any trade-offs..."
-        )
-
-    st.markdown("---")
-
-    # Submit response
-    col1, col2, col3 = st.columns([2, 2, 1])
-
-    with col1:
-        if st.button("📤 Submit Response & Get Feedback", use_container_width=True, type="primary"):
-            voice_transcript = st.session_state.get("dsa_voice_transcript", "")
-            text_resp = st.session_state.get("text_response", "")
-            code = st.session_state.get("code_editor", "")
-
-            # Combine voice and text responses
-            combined_explanation = ""
-            if voice_transcript:
-                combined_explanation += f"[Voice]: {voice_transcript}\n"
-            if text_resp:
-                combined_explanation += f"[Text]: {text_resp}"
-
-            if not combined_explanation.strip() and not code.strip():
-                st.error("Please provide at least a code solution or an explanation.")
-            else:
-                # Add candidate response to conversation
-                candidate_msg = ""
-                if code.strip():
-                    candidate_msg += f"**Code:**\n```python\n{code}\n```\n"
-                if combined_explanation.strip():
-                    candidate_msg += f"\n**Explanation:** {combined_explanation}"
-
-                st.session_state.dsa_conversation.append({
-                    "role": "candidate",
-                    "content": candidate_msg,
-                })
-                db.save_chat_message(session_id, "candidate", candidate_msg)
-
-                # Save recording event for playback
-                db.save_recording_event(session_id, "code_snapshot", {
+            # Add candidate response to conversation
+            candidate_msg = ""
+            if code.strip():
+                candidate_msg += f"**Code:**\n```python\n{code}\n```\n"
+            if combined_explanation.strip():
+                candidate_msg += f"\n**Explanation:** {combined_explanation}"
+
+            dsa.add_message("candidate", candidate_msg)
+
+            # Save the message and recording events for playback in one transaction
+            db.bulk_save_events(session_id, [
+                ("code_snapshot", {
                     "code": code,
-                    "question_number": st.session_state.dsa_question_number + 1,
+                    "question_number": question_number,
                     "explanation": combined_explanation,
-                })
-                db.save_recording_event(session_id, "conversation", {
+                }),
+                ("conversation", {
                     "role": "candidate",
                     "content": candidate_msg,
-                })
-
-                # Extract memories from candidate's response
-                extract_memories_from_conversation(
-                    user_id, session_id,
-                    [{"role": "candidate", "content": combined_explanation}]
-                )
+                }),
+            ], chat_messages=[("candidate", candidate_msg)])
+
+            # Extract memories from candidate's response off the submit path
+            _background_executor().submit(
+                extract_memories_from_conversation,
+                user_id, session_id,
+                [{"role": "candidate", "content": combined_explanation}]
+            )
 
-                with st.spinner("AI is analyzing your response..."):
-                    try:
-                        memory_ctx = get_memory_context_for_ai(user_id)
-                        analysis = analyze_candidate_response(
+            with st.spinner("AI is analyzing your response..."):
+                try:
+                    memory_ctx = dsa.memory_ctx
+                    conversation = dsa.conversation()
+
+                    # Analyze in a worker thread while the interviewer reply
+                    # streams, so the two LLM calls overlap
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        analysis_future = executor.submit(
+                            analyze_candidate_response,
                             question=question,
                             code=code,
                             voice_transcript=combined_explanation,
-                            conversation_history=st.session_state.dsa_conversation,
+                            conversation_history=conversation,
                             user_memory_context=memory_ctx,
                         )
-                        st.session_state.dsa_current_analysis = analysis
-
-                        # Update question in DB
-                        code_score = analysis.get("code_correctness", {}).get("score", 0) * 10
-                        approach_score = analysis.get("approach_analysis", {}).get("score", 0) * 10
-                        comm_score = analysis.get("communication_analysis", {}).get("score", 0) * 10
-
-                        db.update_question_response(
-                            question_id=st.session_state.dsa_question_db_id,
-                            candidate_response_text=combined_explanation,
-                            candidate_code=code,
-                            voice_transcript=voice_transcript,
-                            ai_analysis=json.dumps(analysis),
-                            code_correctness_score=code_score,
-                            approach_score=approach_score,
-                            communication_score=comm_score,
-                            follow_up_questions=analysis.get("follow_up_questions", []),
-                            suggested_solutions=analysis.get("suggested_solutions", []),
-                        )
-
-                        # Generate interviewer response
-                        interviewer_response = generate_interviewer_response(
+                        interviewer_response = st.write_stream(generate_interviewer_response(
                             question=question,
-                            conversation_history=st.session_state.dsa_conversation,
-                            analysis=analysis,
+                            conversation_history=conversation,
                             user_memory_context=memory_ctx,
-                        )
+                            stream=True,
+                        ))
+                        analysis = analysis_future.result()
+                    dsa.current_analysis = analysis
+
+                    # Update question in DB
+                    code_score = analysis.get("code_correctness", {}).get("score", 0) * 10
+                    approach_score = analysis.get("approach_analysis", {}).get("score", 0) * 10
+                    comm_score = analysis.get("communication_analysis", {}).get("score", 0) * 10
+
+                    db.update_question_response(
+                        question_id=dsa.question_db_id,
+                        candidate_response_text=combined_explanation,
+                        candidate_code=code,
+                        voice_transcript=voice_transcript,
+                        ai_analysis=analysis,
+                        code_correctness_score=code_score,
+                        approach_score=approach_score,
+                        communication_score=comm_score,
+                        follow_up_questions=analysis.get("follow_up_questions", []),
+                        suggested_solutions=analysis.get("suggested_solutions", []),
+                    )
 
-                        st.session_state.dsa_conversation.append({
-                            "role": "interviewer",
-                            "content": interviewer_response,
-                        })
-                        st.session_state.dsa_last_ai_message = interviewer_response
-                        db.save_chat_message(session_id, "interviewer", interviewer_response)
+                    dsa.add_message("interviewer", interviewer_response)
+                    dsa.last_ai_message = interviewer_response
 
-                        # Save recording events
-                        db.save_recording_event(session_id, "analysis", {
+                    # Save the reply and recording events in one transaction
+                    db.bulk_save_events(session_id, [
+                        ("analysis", {
                             "analysis": analysis,
-                            "question_number": st.session_state.dsa_question_number + 1,
-                        })
-                        db.save_recording_event(session_id, "conversation", {
+                            "question_number": question_number,
+                        }),
+                        ("conversation", {
                             "role": "interviewer",
                             "content": interviewer_response,
-                        })
+                        }),
+                    ], chat_messages=[("interviewer", interviewer_response)])
 
-                    except Exception as e:
-                        st.error(f"AI Analysis Error: {e}")
-                        st.session_state.dsa_conversation.append({
-                            "role": "system",
-                            "content": f"AI analysis unavailable. Your response has been recorded.",
-                        })
-                        db.update_question_response(
-                            question_id=st.session_state.dsa_question_db_id,
-                            candidate_response_text=combined_explanation,
-                            candidate_code=code,
-                            voice_transcript=voice_transcript,
-                        )
+                except Exception as e:
+                    st.error(f"AI Analysis Error: {e}")
+                    dsa.add_message("system", "AI analysis unavailable. Your response has been recorded.")
+                    db.update_question_response(
+                        question_id=dsa.question_db_id,
+                        candidate_response_text=combined_explanation,
+                        candidate_code=code,
+                        voice_transcript=voice_transcript,
+                    )
 
-                # Clear voice transcript for next response
-                st.session_state.dsa_voice_transcript = ""
-                st.rerun()
+            # Clear voice transcript for next response
+            dsa.voice_transcript = ""
+            st.rerun()
 
-    with col2:
+    st.markdown("---")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
         if st.button("⏭️ Next Question", use_container_width=True):
-            st.session_state.dsa_question_number += 1
-            st.session_state.dsa_current_question = None
-            st.session_state.dsa_current_analysis = None
-            st.session_state.dsa_voice_transcript = ""
+            dsa.question_number += 1
+            dsa.current_question = None
+            dsa.current_analysis = None
+            dsa.voice_transcript = ""
             st.rerun()
 
-    with col3:
+    with col2:
         if st.button("💡 Get Hint", use_container_width=True):
             if hints:
-                hint_idx = min(
-                    st.session_state.get("dsa_hint_idx", 0),
-                    len(hints) - 1
-                )
+                hint_idx = min(dsa.hint_idx, len(hints) - 1)
                 hint_msg = f"💡 **Hint:** {hints[hint_idx]}"
-                st.session_state.dsa_conversation.append({
-                    "role": "interviewer",
-                    "content": hint_msg,
-                })
-                st.session_state.dsa_hint_idx = hint_idx + 1
-                st.rerun()
+                dsa.add_message("interviewer", hint_msg)
+                dsa.hint_idx = hint_idx + 1
+                _show_conversation(conversation_box, dsa)
 
     # Display analysis if available
-    analysis = st.session_state.get("dsa_current_analysis")
+    analysis = dsa.current_analysis
     if analysis:
         st.markdown("---")
         st.markdown("### 📊 AI Analysis of Your Response")
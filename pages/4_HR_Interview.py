@@ -1,16 +1,13 @@
 """HR Interview Simulation page."""
 
+import hashlib
+import time
 import streamlit as st
-import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 import database as db
 import auth_utils as auth
-from ai_engine import generate_hr_questions, analyze_hr_response, generate_final_report
-from voice_handler import transcribe_audio, analyze_speech_patterns, synthesize_speech, get_browser_stt_component
 import streamlit.components.v1 as components
-from browser_lock import inject_browser_lock
-from webcam_proctor import inject_webcam_proctor
-from user_memory import extract_memories_from_conversation, extract_memories_with_ai, get_memory_context_for_ai
 
 load_dotenv()
 
@@ -22,46 +19,241 @@ st.set_page_config(page_title="IntervueX – HR Interview", page_icon="🤝", la
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from ui_utils import apply_global_css
+from ui_utils import apply_global_css, render_chat_message
 apply_global_css()
 
-st.markdown("""
-<style>
-    .interviewer-msg {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid rgba(128, 128, 128, 0.2);
-        border-left: 4px solid #818CF8;
-        padding: 16px 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-    }
-    .candidate-msg {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid rgba(128, 128, 128, 0.2);
-        border-left: 4px solid #34D399;
-        padding: 16px 20px;
-        border-radius: 12px;
-        margin: 10px 0;
-    }
-    .hr-question-card {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: 1px solid #EC4899;
-        border-radius: 16px;
-        padding: 24px;
-        margin: 15px 0;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 if not st.session_state.get("user_id"):
     st.warning("Please sign in from the home page to start an interview.")
     st.stop()
 
 user_id = st.session_state.user_id
 
+# Answers analyzed per LLM call in batch mode
+HR_ANALYSIS_BATCH_SIZE = 3
+# Seconds between tab violation lookups for the top bar
+VIOLATIONS_POLL_INTERVAL = 5
+
+
+@st.cache_resource
+def _background_executor() -> ThreadPoolExecutor:
+    """Worker pool shared across reruns for fire-and-forget DB writes and memory extraction."""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def _check_background_tasks():
+    """Report failed background tasks without waiting on unfinished ones."""
+    futures = st.session_state.hr_bg_futures
+    if not futures:
+        return
+    done, pending = wait(futures, timeout=0)
+    for future in done:
+        if future.exception() is not None:
+            st.warning(f"A background save failed: {future.exception()}")
+    st.session_state.hr_bg_futures = list(pending)
+
+
+def _analyze_hr_answer(feedback_box, item: dict) -> dict:
+    """Stream the analysis of one answer, drawing feedback into feedback_box as it arrives."""
+    from ai_engine import analyze_hr_response_stream
+
+    analysis = None
+    for update in analyze_hr_response_stream(
+        item["question"], item["response_text"], item["what_to_look_for"],
+        user_memory_context=st.session_state.hr_memory_ctx,
+    ):
+        if isinstance(update, dict):
+            analysis = update
+        else:
+            feedback_box.markdown(f"**Feedback:** {update}▌")
+    return analysis
+
+
+def _warm_tts(text: str):
+    """Start synthesizing an interviewer message so playback is instant when requested."""
+    from voice_handler import synthesize_speech
+
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    if key not in st.session_state.hr_tts_cache:
+        st.session_state.hr_tts_cache[key] = _background_executor().submit(synthesize_speech, text)
+    return st.session_state.hr_tts_cache[key]
+
+
+@st.cache_resource
+def _browser_stt_html() -> str:
+    """Browser speech-to-text widget markup, built once per process."""
+    from voice_handler import get_browser_stt_component
+
+    return get_browser_stt_component()
+
+
+def _finalize_session(session_id: int, spinner_text: str):
+    """Score the interview, extract memories and open its report in History."""
+    from ai_engine import generate_final_report
+    from user_memory import extract_memories_with_ai
+
+    with st.spinner(spinner_text):
+        _flush_hr_analyses(session_id, after=list(st.session_state.hr_bg_futures))
+        # The report reads the saved analyses
+        wait(st.session_state.hr_bg_futures)
+
+        # Memory extraction does not depend on the report; it finishes in the
+        # background instead of holding up the redirect
+        st.session_state.hr_bg_futures.append(_background_executor().submit(
+            extract_memories_with_ai, user_id, session_id, list(st.session_state.hr_conversation)
+        ))
+        try:
+            db_questions = db.get_session_questions(session_id)
+            session_data = db.get_session(session_id)
+            report = generate_final_report(
+                db_questions, "hr",
+                session_data.get("tab_violations", 0) if session_data else 0
+            )
+            db.update_session_scores(
+                session_id=session_id,
+                overall=report.get("overall_score", 0),
+                technical=report.get("technical_score", 0),
+                communication=report.get("communication_score", 0),
+                reasoning=report.get("reasoning_score", 0),
+                problem_solving=report.get("problem_solving_score", 0),
+                feedback=report,
+            )
+        except Exception as e:
+            st.warning(f"Could not generate AI report: {e}")
+            db.complete_session(session_id)
+
+    st.session_state.hr_interview_active = False
+    st.session_state.view_session_id = session_id
+    st.switch_page("pages/5_History.py")
+
+
+def _normalize_hr_question(q) -> dict:
+    """Turn a generated HR question into a dict with every key the page reads."""
+    if not isinstance(q, dict):
+        q = {"question": str(q)}
+    return {
+        "question": q.get("question", ""),
+        "category": q.get("category", "general"),
+        "what_to_look_for": q.get("what_to_look_for", ""),
+        "follow_ups": q.get("follow_ups", []),
+    }
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _question_card_html(category: str, question_text: str) -> str:
+    """Render the current question card, cached across reruns."""
+    return f"""
+    <div class="hr-question-card">
+        <span style="background:#EC4899;color:white;padding:2px 10px;border-radius:12px;font-size:0.8rem;">
+            {category.upper()}
+        </span>
+        <h3 style="margin-top:12px;">🤖 {question_text}</h3>
+    </div>
+    """
+
+
+def _answer_records(item: dict) -> tuple:
+    """Recording events and chat messages for a candidate's answer."""
+    return (
+        [("conversation", {
+            "role": "candidate",
+            "content": item["response_text"],
+            "question_number": item["idx"] + 1,
+        })],
+        [("candidate", item["response_text"])],
+    )
+
+
+def _save_hr_analysis(session_id: int, question_id, item: dict, analysis: dict,
+                      feedback_msg: str, after=None, include_answer: bool = False):
+    """Write one answer's analysis and feedback to the database.
+
+    With include_answer, the candidate's answer is saved in the same
+    transaction, ahead of the feedback. after is a list of futures to wait
+    for first.
+    """
+    # Keep the answers ahead of the feedback in the chat log
+    if after:
+        wait(after)
+    if question_id is not None:
+        db.update_question_response(
+            question_id=question_id,
+            candidate_response_text=item["response_text"],
+            voice_transcript=item["voice_transcript"],
+            ai_analysis=analysis,
+            communication_score=analysis.get("communication_score", 0) * 10,
+            approach_score=analysis.get("relevance_score", 0) * 10,
+        )
+    events, chat_messages = _answer_records(item) if include_answer else ([], [])
+    events += [
+        ("analysis", {
+            "analysis": analysis,
+            "question_number": item["idx"] + 1,
+        }),
+        ("conversation", {
+            "role": "interviewer",
+            "content": feedback_msg,
+        }),
+    ]
+    chat_messages.append(("interviewer", feedback_msg))
+    db.bulk_save_events(session_id, events, chat_messages)
+
+
+def _record_hr_analysis(session_id: int, db_questions: list, item: dict,
+                        analysis: dict, batched: bool = False, after=None,
+                        include_answer: bool = False):
+    """Add the interviewer's feedback to the conversation and save the analysis in the background."""
+    idx = item["idx"]
+    st.session_state.hr_responses[idx] = analysis
+
+    # Add interviewer feedback to conversation
+    feedback_msg = analysis.get("feedback", "Thank you for your response.")
+    follow_ups = analysis.get("follow_up_questions", [])
+    if follow_ups:
+        feedback_msg += f"\n\n**Follow-up:** {follow_ups[0]}"
+    if batched:
+        feedback_msg = f"**Feedback on question {idx + 1}:** {feedback_msg}"
+
+    st.session_state.hr_conversation.append({
+        "role": "interviewer",
+        "content": feedback_msg,
+    })
+    st.session_state.hr_last_ai_message = feedback_msg
+    _warm_tts(feedback_msg)
+
+    question_id = db_questions[idx]["id"] if idx < len(db_questions) else None
+    st.session_state.hr_bg_futures.append(_background_executor().submit(
+        _save_hr_analysis, session_id, question_id, item, analysis, feedback_msg,
+        after, include_answer,
+    ))
+
+
+def _flush_hr_analyses(session_id: int, after=None):
+    """Analyze every queued answer in one batched LLM call and record the results.
+
+    If the call fails, each answer is recorded with the neutral fallback
+    analysis, so none of them is left without one.
+    """
+    from ai_engine import analyze_hr_responses_batch, _hr_analysis_fallback
+
+    pending = st.session_state.hr_pending_analysis
+    if not pending:
+        return
+    try:
+        analyses = analyze_hr_responses_batch(
+            pending, user_memory_context=st.session_state.hr_memory_ctx
+        )
+    except Exception:
+        analyses = [_hr_analysis_fallback() for _ in pending]
+        st.session_state.hr_conversation.append({
+            "role": "system",
+            "content": "AI analysis unavailable. Your responses have been recorded.",
+        })
+    st.session_state.hr_pending_analysis = []
+    db_questions = st.session_state.hr_db_questions
+    for item, analysis in zip(pending, analyses):
+        _record_hr_analysis(session_id, db_questions, item, analysis, batched=True, after=after)
+
+
 # Initialize HR interview state
 if "hr_session_id" not in st.session_state:
     st.session_state.hr_session_id = None
@@ -74,9 +266,27 @@ if "hr_interview_active" not in st.session_state:
 if "hr_conversation" not in st.session_state:
     st.session_state.hr_conversation = []
 if "hr_responses" not in st.session_state:
-    st.session_state.hr_responses = []
+    st.session_state.hr_responses = {}
+if "hr_pending_analysis" not in st.session_state:
+    st.session_state.hr_pending_analysis = []
+if "hr_batch_analysis" not in st.session_state:
+    st.session_state.hr_batch_analysis = False
+if "hr_memory_ctx" not in st.session_state:
+    st.session_state.hr_memory_ctx = ""
+if "hr_bg_futures" not in st.session_state:
+    st.session_state.hr_bg_futures = []
+if "hr_db_questions" not in st.session_state:
+    st.session_state.hr_db_questions = []
+if "hr_violations" not in st.session_state:
+    st.session_state.hr_violations = (0.0, 0)
+if "hr_transcribe_file_id" not in st.session_state:
+    st.session_state.hr_transcribe_file_id = None
+if "hr_transcribe_future" not in st.session_state:
+    st.session_state.hr_transcribe_future = None
 if "hr_last_ai_message" not in st.session_state:
     st.session_state.hr_last_ai_message = ""
+if "hr_tts_cache" not in st.session_state:
+    st.session_state.hr_tts_cache = {}
 
 st.markdown("## 🤝 HR Interview Simulation")
 
@@ -90,6 +300,13 @@ if not st.session_state.hr_interview_active:
     target_role = st.text_input("Target Role", value="Software Engineer",
                                 placeholder="e.g., Senior Backend Developer")
 
+    batch_analysis = st.checkbox(
+        "Batch answer analysis",
+        value=False,
+        help=f"Analyze answers {HR_ANALYSIS_BATCH_SIZE} at a time in a single AI call. "
+             "Faster overall, but feedback arrives every few answers instead of after each one.",
+    )
+
     if skills:
         st.info(f"🎯 Questions will be personalized based on your resume: {', '.join(skills[:6])}")
     else:
@@ -98,6 +315,9 @@ if not st.session_state.hr_interview_active:
     st.markdown("---")
 
     if st.button("🚀 Start HR Interview", use_container_width=True, type="primary"):
+        from ai_engine import generate_hr_questions
+        from user_memory import get_memory_context_for_ai
+
         with st.spinner("AI is preparing your personalized HR questions..."):
             session_id = db.create_session(
                 user_id=user_id,
@@ -106,6 +326,8 @@ if not st.session_state.hr_interview_active:
                 topic=target_role,
             )
 
+            # Fetched once per interview and reused for every LLM call
+            memory_ctx = ""
             try:
                 memory_ctx = get_memory_context_for_ai(user_id)
                 hr_questions = generate_hr_questions(
@@ -123,39 +345,52 @@ if not st.session_state.hr_interview_active:
                     {"question": "Where do you see yourself in 5 years?", "category": "behavioral", "what_to_look_for": "Career vision and ambition", "follow_ups": ["How does this role fit into that plan?"]},
                     {"question": "Why are you interested in this role?", "category": "culture-fit", "what_to_look_for": "Genuine interest and research", "follow_ups": ["What excites you most about this opportunity?"]},
                 ]
+            hr_questions = [_normalize_hr_question(q) for q in hr_questions]
 
             st.session_state.hr_session_id = session_id
             st.session_state.hr_questions = hr_questions
             st.session_state.hr_current_idx = 0
             st.session_state.hr_interview_active = True
             st.session_state.hr_conversation = []
-            st.session_state.hr_responses = []
+            st.session_state.hr_responses = {}
+            st.session_state.hr_pending_analysis = []
+            st.session_state.hr_batch_analysis = batch_analysis
+            st.session_state.hr_memory_ctx = memory_ctx
 
             # Save questions to DB
-            for i, q in enumerate(hr_questions):
-                q_text = q.get("question", "") if isinstance(q, dict) else str(q)
-                db.save_question(
-                    session_id=session_id,
-                    question_number=i + 1,
-                    question_text=q_text,
-                    question_type="hr",
-                    difficulty="medium",
-                )
+            db.bulk_save_questions(
+                session_id,
+                [q["question"] for q in hr_questions],
+                question_type="hr",
+                difficulty="medium",
+            )
+            st.session_state.hr_db_questions = db.get_session_questions(session_id)
+            st.session_state.hr_violations = (0.0, 0)
 
             # Add intro message
             intro = f"Welcome! I'll be conducting your HR interview for the **{target_role}** position. Let's begin with our first question."
             st.session_state.hr_conversation.append({"role": "interviewer", "content": intro})
             st.session_state.hr_last_ai_message = intro
+            st.session_state.hr_tts_cache = {}
+            _warm_tts(intro)
             db.save_chat_message(session_id, "interviewer", intro)
 
         st.rerun()
 
 else:
+    # Active interview. The voice and proctoring modules are imported here
+    # so the setup screen renders without loading them; the LLM helpers
+    # import what they need when called.
+    from voice_handler import transcribe_audio_fast
+    from browser_lock import inject_browser_lock
+    from webcam_proctor import inject_webcam_proctor
+
     session_id = st.session_state.hr_session_id
     
     # Inject browser lock and webcam proctoring
     inject_browser_lock(session_id)
     inject_webcam_proctor(session_id)
+    _check_background_tasks()
 
     questions = st.session_state.hr_questions
     current_idx = st.session_state.hr_current_idx
@@ -165,111 +400,46 @@ else:
     with col1:
         st.markdown(f"**Question {current_idx + 1} of {len(questions)}**")
     with col2:
-        session = db.get_session(session_id)
-        violations = session.get("tab_violations", 0) if session else 0
+        checked_at, violations = st.session_state.hr_violations
+        if time.time() - checked_at > VIOLATIONS_POLL_INTERVAL:
+            session = db.get_session(session_id)
+            violations = session.get("tab_violations", 0) if session else 0
+            st.session_state.hr_violations = (time.time(), violations)
         if violations > 0:
             st.error(f"⚠️ Violations: {violations}")
         else:
             st.success("✅ Clean")
     with col3:
         if st.button("🛑 End Interview"):
-            with st.spinner("Generating report..."):
-                try:
-                    db_questions = db.get_session_questions(session_id)
-                    session_data = db.get_session(session_id)
-                    report = generate_final_report(
-                        db_questions, "hr",
-                        session_data.get("tab_violations", 0) if session_data else 0
-                    )
-                    db.update_session_scores(
-                        session_id=session_id,
-                        overall=report.get("overall_score", 0),
-                        technical=report.get("technical_score", 0),
-                        communication=report.get("communication_score", 0),
-                        reasoning=report.get("reasoning_score", 0),
-                        problem_solving=report.get("problem_solving_score", 0),
-                        feedback=report,
-                    )
-                except Exception as e:
-                    st.warning(f"Could not generate AI report: {e}")
-                    db.complete_session(session_id)
-
-            # Extract memories from the full conversation
-            try:
-                extract_memories_with_ai(user_id, session_id, st.session_state.hr_conversation)
-            except Exception:
-                pass
-
-            st.session_state.hr_interview_active = False
-            st.session_state.view_session_id = session_id
-            st.switch_page("pages/5_History.py")
+            _finalize_session(session_id, "Generating report...")
 
     st.markdown("---")
 
     if current_idx >= len(questions):
         # Interview complete
-        with st.spinner("Generating final report..."):
-            try:
-                db_questions = db.get_session_questions(session_id)
-                session_data = db.get_session(session_id)
-                report = generate_final_report(
-                    db_questions, "hr",
-                    session_data.get("tab_violations", 0) if session_data else 0
-                )
-                db.update_session_scores(
-                    session_id=session_id,
-                    overall=report.get("overall_score", 0),
-                    technical=report.get("technical_score", 0),
-                    communication=report.get("communication_score", 0),
-                    reasoning=report.get("reasoning_score", 0),
-                    problem_solving=report.get("problem_solving_score", 0),
-                    feedback=report,
-                )
-            except Exception as e:
-                st.warning(f"Could not generate AI report: {e}")
-                db.complete_session(session_id)
-
-        # Extract memories from the full conversation
-        try:
-            extract_memories_with_ai(user_id, session_id, st.session_state.hr_conversation)
-        except Exception:
-            pass
-
-        st.session_state.hr_interview_active = False
-        st.session_state.view_session_id = session_id
-        st.switch_page("pages/5_History.py")
+        _finalize_session(session_id, "Generating final report...")
 
     current_q = questions[current_idx]
-    q_text = current_q.get("question", "") if isinstance(current_q, dict) else str(current_q)
-    category = current_q.get("category", "general") if isinstance(current_q, dict) else "general"
+    q_text = current_q["question"]
+    category = current_q["category"]
 
     # Display current question
-    st.markdown(f"""
-    <div class="hr-question-card">
-        <span style="background:#EC4899;color:white;padding:2px 10px;border-radius:12px;font-size:0.8rem;">
-            {category.upper()}
-        </span>
-        <h3 style="margin-top:12px;">🤖 {q_text}</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_question_card_html(category, q_text), unsafe_allow_html=True)
 
     # Conversation history
     if st.session_state.hr_conversation:
         with st.expander("💬 Conversation History", expanded=False):
-            for msg in st.session_state.hr_conversation:
-                if msg["role"] == "interviewer":
-                    st.markdown(f'<div class="interviewer-msg">🤖 <strong>Interviewer:</strong><br>{msg["content"]}</div>',
-                                unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="candidate-msg">👤 <strong>You:</strong><br>{msg["content"]}</div>',
-                                unsafe_allow_html=True)
+            # One markdown call for the whole history
+            st.markdown("\n\n".join(render_chat_message(msg["role"], msg["content"])
+                                    for msg in st.session_state.hr_conversation),
+                        unsafe_allow_html=True)
 
     # Optional: play the latest interviewer message via TTS
     last_ai = st.session_state.get("hr_last_ai_message", "")
     if last_ai:
         if st.button("🔊 Listen to interviewer", key="hr_tts_play"):
             with st.spinner("Generating audio..."):
-                tts_result = synthesize_speech(last_ai)
+                tts_result = _warm_tts(last_ai).result()
                 if tts_result.get("error"):
                     st.error(tts_result["error"])
                 else:
@@ -280,15 +450,8 @@ else:
     # Response area
     st.markdown("### Your Response")
 
-    tab1, tab2, tab3 = st.tabs(["💬 Text Response", "🎙️ Voice Response", "🗣️ Browser Speech-to-Text"])
-
-    with tab1:
-        hr_text_response = st.text_area(
-            "Type your answer:",
-            height=200,
-            key=f"hr_text_{current_idx}",
-            placeholder="Take your time to structure your response. Use the STAR method for behavioral questions..."
-        )
+    # Voice input stays outside the form so recording and transcription update live
+    tab2, tab3 = st.tabs(["🎙️ Voice Response", "🗣️ Browser Speech-to-Text"])
 
     with tab2:
         st.markdown("Record your verbal response:")
@@ -296,10 +459,16 @@ else:
 
         if audio_data is not None:
             st.audio(audio_data)
+            # Upload to Deepgram as soon as a recording lands, so the
+            # transcript is usually ready before it is asked for
+            if st.session_state.hr_transcribe_file_id != audio_data.file_id:
+                st.session_state.hr_transcribe_file_id = audio_data.file_id
+                st.session_state.hr_transcribe_future = _background_executor().submit(
+                    transcribe_audio_fast, audio_data, "audio/wav"
+                )
             if st.button("📝 Transcribe", key=f"hr_transcribe_{current_idx}"):
                 with st.spinner("Transcribing..."):
-                    audio_bytes = audio_data.read()
-                    result = transcribe_audio(audio_bytes, "audio/wav")
+                    result = st.session_state.hr_transcribe_future.result()
                     if result.get("error"):
                         st.error(result["error"])
                     else:
@@ -309,15 +478,32 @@ else:
 
     with tab3:
         st.markdown("Use your browser's built-in speech recognition (Chrome/Edge recommended):")
-        components.html(get_browser_stt_component(), height=200)
+        components.html(_browser_stt_html(), height=200)
         st.markdown("""<p style='font-size:0.85rem;color:#6B7280;'>After speaking, the transcript is saved automatically.
-        Copy it to the Text Response tab or it will be included when you submit.</p>""", unsafe_allow_html=True)
+        Copy it into your typed answer below or it will be included when you submit.</p>""", unsafe_allow_html=True)
+
+    # Typed answers only reach the script when the form is submitted,
+    # so typing does not rerun the whole page
+    with st.form(f"hr_submit_{current_idx}", clear_on_submit=False):
+        hr_text_response = st.text_area(
+            "💬 Type your answer:",
+            height=200,
+            key=f"hr_text_{current_idx}",
+            placeholder="Take your time to structure your response. Use the STAR method for behavioral questions..."
+        )
+        submitted = st.form_submit_button("📤 Submit Answer", use_container_width=True, type="primary")
 
     # Submit
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("📤 Submit Answer", use_container_width=True, type="primary"):
+        if submitted:
             voice_transcript = st.session_state.get(f"hr_voice_transcript_{current_idx}", "")
+            if not voice_transcript and audio_data is not None:
+                # Use the background transcription of the recording
+                result = st.session_state.hr_transcribe_future.result()
+                if not result.get("error"):
+                    voice_transcript = result.get("transcript", "")
+                    st.session_state[f"hr_voice_transcript_{current_idx}"] = voice_transcript
             text_resp = hr_text_response or ""
             combined = f"{text_resp} {voice_transcript}".strip()
 
@@ -329,66 +515,42 @@ else:
                     "role": "candidate",
                     "content": combined,
                 })
-                db.save_chat_message(session_id, "candidate", combined)
-
-                # Save recording event for playback
-                db.save_recording_event(session_id, "conversation", {
-                    "role": "candidate",
-                    "content": combined,
-                    "question_number": current_idx + 1,
-                })
-
-                # Extract memories from candidate's response
-                extract_memories_from_conversation(
-                    user_id, session_id,
-                    [{"role": "candidate", "content": combined}]
-                )
 
-                with st.spinner("AI is analyzing your response..."):
+                what_to_look_for = current_q["what_to_look_for"]
+                item = {
+                    "idx": current_idx,
+                    "question": q_text,
+                    "response_text": combined,
+                    "what_to_look_for": what_to_look_for,
+                    "voice_transcript": voice_transcript,
+                }
+
+                if st.session_state.hr_batch_analysis:
+                    # Save the answer now; its analysis comes with the batch
+                    st.session_state.hr_bg_futures.append(_background_executor().submit(
+                        db.bulk_save_events, session_id, *_answer_records(item)
+                    ))
+
+                    # Queue the answer; analyze a full batch in one call
+                    st.session_state.hr_pending_analysis.append(item)
+                    if len(st.session_state.hr_pending_analysis) >= HR_ANALYSIS_BATCH_SIZE:
+                        # Every answer in the batch must be saved before its feedback
+                        with st.spinner("AI is analyzing your recent responses..."):
+                            _flush_hr_analyses(session_id,
+                                               after=list(st.session_state.hr_bg_futures))
+                else:
+                    # Show the feedback as it streams in
+                    feedback_box = st.empty()
+                    feedback_box.info("AI is analyzing your response...")
                     try:
-                        what_to_look_for = current_q.get("what_to_look_for", "") if isinstance(current_q, dict) else ""
-                        memory_ctx = get_memory_context_for_ai(user_id)
-                        analysis = analyze_hr_response(q_text, combined, what_to_look_for,
-                                                      user_memory_context=memory_ctx)
-
-                        # Update DB question
-                        db_questions = db.get_session_questions(session_id)
-                        if current_idx < len(db_questions):
-                            db.update_question_response(
-                                question_id=db_questions[current_idx]["id"],
-                                candidate_response_text=combined,
-                                voice_transcript=voice_transcript,
-                                ai_analysis=json.dumps(analysis),
-                                communication_score=analysis.get("communication_score", 0) * 10,
-                                approach_score=analysis.get("relevance_score", 0) * 10,
-                            )
-
-                        st.session_state.hr_responses.append(analysis)
-
-                        # Add interviewer feedback to conversation
-                        feedback_msg = analysis.get("feedback", "Thank you for your response.")
-                        follow_ups = analysis.get("follow_up_questions", [])
-                        if follow_ups:
-                            feedback_msg += f"\n\n**Follow-up:** {follow_ups[0]}"
-
-                        st.session_state.hr_conversation.append({
-                            "role": "interviewer",
-                            "content": feedback_msg,
-                        })
-                        st.session_state.hr_last_ai_message = feedback_msg
-                        db.save_chat_message(session_id, "interviewer", feedback_msg)
-
-                        # Save recording events
-                        db.save_recording_event(session_id, "analysis", {
-                            "analysis": analysis,
-                            "question_number": current_idx + 1,
-                        })
-                        db.save_recording_event(session_id, "conversation", {
-                            "role": "interviewer",
-                            "content": feedback_msg,
-                        })
-
+                        analysis = _analyze_hr_answer(feedback_box, item)
+                        # The answer is saved together with its analysis
+                        _record_hr_analysis(session_id, st.session_state.hr_db_questions,
+                                            item, analysis, include_answer=True)
                     except Exception as e:
+                        st.session_state.hr_bg_futures.append(_background_executor().submit(
+                            db.bulk_save_events, session_id, *_answer_records(item)
+                        ))
                         st.error(f"AI Analysis Error: {e}")
                         st.session_state.hr_conversation.append({
                             "role": "system",
@@ -402,8 +564,7 @@ else:
             st.session_state.hr_current_idx += 1
             # Add next question to conversation
             if st.session_state.hr_current_idx < len(questions):
-                next_q = questions[st.session_state.hr_current_idx]
-                next_text = next_q.get("question", "") if isinstance(next_q, dict) else str(next_q)
+                next_text = questions[st.session_state.hr_current_idx]["question"]
                 st.session_state.hr_conversation.append({
                     "role": "interviewer",
                     "content": f"Let's move on. {next_text}",
@@ -411,8 +572,12 @@ else:
             st.rerun()
 
     # Display latest analysis
-    if st.session_state.hr_responses and len(st.session_state.hr_responses) > current_idx:
-        analysis = st.session_state.hr_responses[current_idx]
+    if st.session_state.hr_pending_analysis:
+        st.info(f"📝 {len(st.session_state.hr_pending_analysis)} answer(s) queued for analysis. "
+                "Feedback will appear once the batch is analyzed.")
+
+    analysis = st.session_state.hr_responses.get(current_idx)
+    if analysis:
         st.markdown("---")
         st.markdown("### 📊 Response Analysis")
 
@@ -1,8 +1,8 @@
 """Interview Session History and Feedback Reports page."""
 
+import math
+from collections import defaultdict
 import streamlit as st
-import json
-import plotly.graph_objects as go
 from dotenv import load_dotenv
 import database as db
 import auth_utils as auth
@@ -51,13 +51,148 @@ if not st.session_state.get("user_id"):
 
 user_id = st.session_state.user_id
 
+# Recording events shown per timeline page
+TIMELINE_PAGE_SIZE = 50
+# Sessions listed in the selector, normally and with "Show older sessions"
+SESSION_LIST_LIMIT = 50
+SESSION_LIST_MAX = 200
+# Longer code is cut before highlighting unless the user asks for all of it
+CODE_PREVIEW_CHARS = 4096
+
+
+def _timeline_card(background: str, border: str, ts: str, body: str) -> str:
+    """HTML for one recording timeline entry."""
+    return (f'<div style="background:{background};border-left:4px solid {border};'
+            f'padding:12px;border-radius:8px;margin:8px 0;">\n'
+            f'<small style="color:#6B7280;">{ts}</small><br>\n{body}\n</div>')
+
+
+SCORE_LABELS = ("Overall", "Technical", "Communication", "Reasoning", "Problem Solving")
+SCORE_KEYS = ("overall_score", "technical_score", "communication_score",
+              "reasoning_score", "problem_solving_score")
+RADAR_THETA = ("Technical", "Communication", "Reasoning", "Problem Solving", "Overall", "Technical")
+_SCORE_COLORS = ((70, "#34D399"), (50, "#FBBF24"), (float("-inf"), "#EF4444"))
+
+
+def _score_color(score: float) -> str:
+    """Green / amber / red for a 0-100 score."""
+    return next(color for threshold, color in _SCORE_COLORS if score >= threshold)
+
+
+@st.cache_data(show_spinner=False)
+def _score_cards_html(*scores: float) -> str:
+    """Score circles for the session overview, in SCORE_LABELS order."""
+    cards = "".join(f"""
+    <div style="text-align:center;flex:1;">
+        <div class="score-circle" style="background:{_score_color(score)};margin:auto;">{score:.0f}</div>
+        <p style="color:#9CA3AF;margin-top:8px;">{label}</p>
+    </div>""" for label, score in zip(SCORE_LABELS, scores))
+    return f"""
+<div style="display:flex;gap:16px;justify-content:space-around;">{cards}
+</div>
+"""
+
+
+@st.cache_data(show_spinner=False)
+def _build_radar(technical: float, communication: float, reasoning: float,
+                 problem_solving: float, overall: float):
+    """Build the performance radar chart, cached per set of scores."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    # Repeat the first point to close the polygon
+    fig.add_trace(go.Scatterpolar(
+        r=[technical, communication, reasoning, problem_solving, overall, technical],
+        theta=RADAR_THETA,
+        fill="toself",
+        line=dict(color="#818CF8", width=2),
+        fillcolor="rgba(129, 140, 248, 0.2)",
+    ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100]), bgcolor="rgba(0,0,0,0)"),
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=400,
+    )
+    return fig
+
+
+def _show_code(code_text: str, key: str):
+    """st.code with long snippets truncated behind a "Show full code" toggle."""
+    if len(code_text) > CODE_PREVIEW_CHARS and not st.toggle("Show full code", key=key):
+        code_text = code_text[:CODE_PREVIEW_CHARS] + "\n# …truncated…"
+    st.code(code_text, language="python")
+
+
+@st.fragment
+def _recording_timeline(recording_events: list):
+    """Paginated recording timeline.
+
+    Runs as a fragment, so changing the page reruns only the timeline.
+    """
+    # Group events into a timeline. Consecutive cards are emitted as one
+    # markdown element; only code snapshots need an element of their own.
+    with st.expander("▶️ Play Interview Timeline", expanded=False):
+        pages = math.ceil(len(recording_events) / TIMELINE_PAGE_SIZE)
+        page = 1
+        if pages > 1:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1,
+                                   key=f"timeline_page_{recording_events[0]['session_id']}")
+        start = (page - 1) * TIMELINE_PAGE_SIZE
+        cards = []
+
+        def _flush_cards():
+            if cards:
+                st.markdown("\n\n".join(cards), unsafe_allow_html=True)
+                cards.clear()
+
+        for event in recording_events[start:start + TIMELINE_PAGE_SIZE]:
+            data = event["event_data"]
+            etype = event["event_type"]
+            ts = event["timestamp"][:19] if event.get("timestamp") else ""
+
+            if etype == "conversation":
+                role = data.get("role", "unknown")
+                content = data.get("content", "")
+                if role == "interviewer":
+                    cards.append(_timeline_card("#EEF2FF", "#818CF8", ts,
+                                                f"<strong>🤖 Interviewer:</strong> {content[:500]}"))
+                else:
+                    cards.append(_timeline_card("#F0FDF4", "#34D399", ts,
+                                                f"<strong>👤 Candidate:</strong> {content[:500]}"))
+
+            elif etype == "code_snapshot":
+                code_text = data.get("code", "")
+                q_num = data.get("question_number", "?")
+                explanation = data.get("explanation", "")
+                cards.append(_timeline_card("#FFF7ED", "#F59E0B", ts,
+                                            f"<strong>💻 Code Snapshot (Q{q_num})</strong>"))
+                if code_text:
+                    _flush_cards()
+                    _show_code(code_text, f"full_snapshot_{event['id']}")
+                if explanation:
+                    cards.append(f"*Explanation:* {explanation[:300]}")
+
+            elif etype == "analysis":
+                analysis = data.get("analysis", {})
+                q_num = data.get("question_number", "?")
+                if isinstance(analysis, dict):
+                    score = analysis.get("overall_score", analysis.get("relevance_score", "N/A"))
+                    feedback = analysis.get("overall_feedback", analysis.get("feedback", ""))
+                    cards.append(_timeline_card("#FDF2F8", "#EC4899", ts,
+                                                f"<strong>📊 AI Analysis (Q{q_num})</strong> — Score: {score}<br>\n"
+                                                f"{feedback[:300]}"))
+        _flush_cards()
+
+
 st.markdown("## 📜 Interview History & Feedback Reports")
 st.markdown("---")
 
 # Check if we should show a specific session
 view_session_id = st.session_state.get("view_session_id")
 
-sessions = db.get_user_sessions(user_id)
+show_older = st.toggle("Show older sessions", value=False,
+                       help=f"List up to {SESSION_LIST_MAX} sessions instead of the latest {SESSION_LIST_LIMIT}.")
+sessions = db.get_user_sessions(user_id, limit=SESSION_LIST_MAX if show_older else SESSION_LIST_LIMIT)
 
 if not sessions:
     st.info("No interview sessions yet. Start an interview to see your history here!")
@@ -72,12 +207,10 @@ for s in sessions:
     session_options[label] = s["id"]
 
 # Find default selection
-default_idx = 0
-if view_session_id:
-    for i, (label, sid) in enumerate(session_options.items()):
-        if sid == view_session_id:
-            default_idx = i
-            break
+try:
+    default_idx = list(session_options.values()).index(view_session_id)
+except ValueError:
+    default_idx = 0
 
 selected_label = st.selectbox(
     "Select a session to view:",
@@ -87,105 +220,47 @@ selected_label = st.selectbox(
 selected_session_id = session_options[selected_label]
 
 # Load session data
-session = db.get_session(selected_session_id)
-questions = db.get_session_questions(selected_session_id)
-chat_messages = db.get_chat_messages(selected_session_id)
-violations = db.get_tab_violations(selected_session_id)
-
-if not session:
+bundle = db.get_session_bundle(selected_session_id)
+if not bundle:
     st.error("Session not found.")
     st.stop()
 
-feedback = session.get("feedback", {})
+session = bundle["session"]
+questions = bundle["questions"]
+chat_messages = bundle["chat_messages"]
+violations = bundle["tab_violations"]
+
+feedback = session["feedback"]
 
 # Session Overview
 st.markdown("### 📋 Session Overview")
 
-col1, col2, col3, col4, col5 = st.columns(5)
-with col1:
-    score = session["overall_score"]
-    color = "#34D399" if score >= 70 else "#FBBF24" if score >= 50 else "#EF4444"
-    st.markdown(f"""
-    <div style="text-align:center;">
-        <div class="score-circle" style="background:{color};margin:auto;">{score:.0f}</div>
-        <p style="color:#9CA3AF;margin-top:8px;">Overall</p>
-    </div>
-    """, unsafe_allow_html=True)
-with col2:
-    score = session["technical_score"]
-    color = "#34D399" if score >= 70 else "#FBBF24" if score >= 50 else "#EF4444"
-    st.markdown(f"""
-    <div style="text-align:center;">
-        <div class="score-circle" style="background:{color};margin:auto;">{score:.0f}</div>
-        <p style="color:#9CA3AF;margin-top:8px;">Technical</p>
-    </div>
-    """, unsafe_allow_html=True)
-with col3:
-    score = session["communication_score"]
-    color = "#34D399" if score >= 70 else "#FBBF24" if score >= 50 else "#EF4444"
-    st.markdown(f"""
-    <div style="text-align:center;">
-        <div class="score-circle" style="background:{color};margin:auto;">{score:.0f}</div>
-        <p style="color:#9CA3AF;margin-top:8px;">Communication</p>
-    </div>
-    """, unsafe_allow_html=True)
-with col4:
-    score = session["reasoning_score"]
-    color = "#34D399" if score >= 70 else "#FBBF24" if score >= 50 else "#EF4444"
-    st.markdown(f"""
-    <div style="text-align:center;">
-        <div class="score-circle" style="background:{color};margin:auto;">{score:.0f}</div>
-        <p style="color:#9CA3AF;margin-top:8px;">Reasoning</p>
-    </div>
-    """, unsafe_allow_html=True)
-with col5:
-    score = session["problem_solving_score"]
-    color = "#34D399" if score >= 70 else "#FBBF24" if score >= 50 else "#EF4444"
-    st.markdown(f"""
-    <div style="text-align:center;">
-        <div class="score-circle" style="background:{color};margin:auto;">{score:.0f}</div>
-        <p style="color:#9CA3AF;margin-top:8px;">Problem Solving</p>
-    </div>
-    """, unsafe_allow_html=True)
+# One element for all five cards
+st.markdown(_score_cards_html(*(session[key] for key in SCORE_KEYS)), unsafe_allow_html=True)
 
 # Session details
 st.markdown("---")
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.markdown(f"**Type:** {session['session_type'].upper()}")
-with col2:
-    st.markdown(f"**Difficulty:** {session.get('difficulty', 'N/A').title()}")
-with col3:
-    st.markdown(f"**Status:** {'Completed ✅' if session['status'] == 'completed' else 'In Progress 🟡'}")
-with col4:
-    v_count = session.get("tab_violations", 0)
-    v_color = "#EF4444" if v_count > 0 else "#34D399"
-    st.markdown(f"**Tab Violations:** <span style='color:{v_color};font-weight:700;'>{v_count}</span>", unsafe_allow_html=True)
+v_count = session.get("tab_violations", 0)
+v_color = "#EF4444" if v_count > 0 else "#34D399"
+st.markdown(f"""
+<div style="display:flex;gap:16px;">
+    <div style="flex:1;"><strong>Type:</strong> {session['session_type'].upper()}</div>
+    <div style="flex:1;"><strong>Difficulty:</strong> {(session.get('difficulty') or 'N/A').title()}</div>
+    <div style="flex:1;"><strong>Status:</strong> {'Completed ✅' if session['status'] == 'completed' else 'In Progress 🟡'}</div>
+    <div style="flex:1;"><strong>Tab Violations:</strong> <span style='color:{v_color};font-weight:700;'>{v_count}</span></div>
+</div>
+""", unsafe_allow_html=True)
 
 # Radar chart for this session
 st.markdown("---")
 st.markdown("### 🕸️ Performance Radar")
 
-fig_radar = go.Figure()
-categories = ["Technical", "Communication", "Reasoning", "Problem Solving", "Overall"]
-values = [
+fig_radar = _build_radar(
     session["technical_score"],
     session["communication_score"],
     session["reasoning_score"],
     session["problem_solving_score"],
     session["overall_score"],
-]
-fig_radar.add_trace(go.Scatterpolar(
-    r=values + [values[0]],
-    theta=categories + [categories[0]],
-    fill="toself",
-    line=dict(color="#818CF8", width=2),
-    fillcolor="rgba(129, 140, 248, 0.2)",
-))
-fig_radar.update_layout(
-    polar=dict(radialaxis=dict(visible=True, range=[0, 100]), bgcolor="rgba(0,0,0,0)"),
-    paper_bgcolor="rgba(0,0,0,0)",
-    height=400,
 )
 st.plotly_chart(fig_radar, use_container_width=True)
 
@@ -208,7 +283,7 @@ if feedback:
         r_color = readiness_colors.get(readiness, "#9CA3AF")
         st.markdown(f"**Interview Readiness:** <span style='color:{r_color};font-weight:700;font-size:1.2rem;'>{readiness.replace('_', ' ').title()}</span>", unsafe_allow_html=True)
 
-    detailed = feedback.get("detailed_feedback", {})
+    detailed = feedback.get("detailed_feedback") or {}
     if detailed:
         col1, col2 = st.columns(2)
         with col1:
@@ -229,15 +304,15 @@ if feedback:
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("**✅ Areas of Strength**")
-            for s in detailed.get("areas_of_strength", []):
+            for s in detailed.get("areas_of_strength") or ():
                 st.markdown(f"- {s}")
         with col2:
             st.markdown("**📈 Areas for Improvement**")
-            for i in detailed.get("areas_for_improvement", []):
+            for i in detailed.get("areas_for_improvement") or ():
                 st.markdown(f"- {i}")
         with col3:
             st.markdown("**📚 Recommended Topics to Study**")
-            for t in detailed.get("recommended_topics_to_study", []):
+            for t in detailed.get("recommended_topics_to_study") or ():
                 st.markdown(f"- {t}")
 
     recommendation = feedback.get("recommendation", "")
@@ -266,7 +341,7 @@ if questions:
 
             if q.get("candidate_code"):
                 st.markdown("**Your Code:**")
-                st.code(q["candidate_code"], language="python")
+                _show_code(q["candidate_code"], f"full_code_{q['id']}")
 
             if q.get("candidate_response_text"):
                 st.markdown(f"**Your Explanation:** {q['candidate_response_text']}")
@@ -274,29 +349,26 @@ if questions:
             if q.get("voice_transcript"):
                 st.markdown(f"**Voice Transcript:** {q['voice_transcript']}")
 
-            if q.get("ai_analysis"):
-                try:
-                    analysis = json.loads(q["ai_analysis"])
-                    st.markdown(f"**AI Feedback:** {analysis.get('overall_feedback', '')}")
-
-                    # Follow-ups
-                    follow_ups = q.get("follow_up_questions", [])
-                    if follow_ups:
-                        st.markdown("**Follow-up Questions:**")
-                        for fu in follow_ups:
-                            st.markdown(f"- {fu}")
-
-                    # Solutions
-                    solutions = q.get("suggested_solutions", [])
-                    if solutions:
-                        st.markdown("**Suggested Solutions:**")
-                        for sol in solutions:
-                            if isinstance(sol, dict):
-                                st.markdown(f"**{sol.get('approach', '')}:** {sol.get('description', '')}")
-                                if sol.get("code"):
-                                    st.code(sol["code"], language="python")
-                except (json.JSONDecodeError, TypeError):
-                    pass
+            analysis = q["analysis"]
+            if analysis:
+                st.markdown(f"**AI Feedback:** {analysis.get('overall_feedback', '')}")
+
+                # Follow-ups
+                follow_ups = q.get("follow_up_questions", [])
+                if follow_ups:
+                    st.markdown("**Follow-up Questions:**")
+                    for fu in follow_ups:
+                        st.markdown(f"- {fu}")
+
+                # Solutions
+                solutions = q.get("suggested_solutions", [])
+                if solutions:
+                    st.markdown("**Suggested Solutions:**")
+                    for j, sol in enumerate(solutions):
+                        if isinstance(sol, dict):
+                            st.markdown(f"**{sol.get('approach', '')}:** {sol.get('description', '')}")
+                            if sol.get("code"):
+                                _show_code(sol["code"], f"full_solution_{q['id']}_{j}")
 
 # Chat log
 if chat_messages:
@@ -318,7 +390,7 @@ if violations:
         st.warning(f"**{v['violation_type']}** at {v['violation_time']}: {v.get('details', 'Tab switch detected')}")
 
 # Webcam Proctoring Violations
-proctor_violations = db.get_proctoring_violations(selected_session_id)
+proctor_violations = bundle["proctoring_violations"]
 if proctor_violations:
     st.markdown("---")
     st.markdown("### 📹 Webcam Proctoring Violations")
@@ -334,65 +406,13 @@ if proctor_violations:
         st.warning(f"{icon} **{label}** at {pv['violation_time'][:19]} — {pv.get('detail', '')}")
 
 # Interview Recording Playback
-recording_events = db.get_recording_events(selected_session_id)
+recording_events = bundle["recording_events"]
 if recording_events:
     st.markdown("---")
     st.markdown("### 🎬 Interview Recording Playback")
     st.markdown("Replay the interview timeline: conversations, code snapshots, and AI analysis.")
 
-    # Group events into a timeline
-    with st.expander("▶️ Play Interview Timeline", expanded=False):
-        for idx, event in enumerate(recording_events):
-            data = event["event_data"]
-            etype = event["event_type"]
-            ts = event["timestamp"][:19] if event.get("timestamp") else ""
-
-            if etype == "conversation":
-                role = data.get("role", "unknown")
-                content = data.get("content", "")
-                if role == "interviewer":
-                    st.markdown(f"""
-                    <div style="background:#EEF2FF;border-left:4px solid #818CF8;padding:12px;border-radius:8px;margin:8px 0;">
-                        <small style="color:#6B7280;">{ts}</small><br>
-                        <strong>🤖 Interviewer:</strong> {content[:500]}
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div style="background:#F0FDF4;border-left:4px solid #34D399;padding:12px;border-radius:8px;margin:8px 0;">
-                        <small style="color:#6B7280;">{ts}</small><br>
-                        <strong>👤 Candidate:</strong> {content[:500]}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            elif etype == "code_snapshot":
-                code_text = data.get("code", "")
-                q_num = data.get("question_number", "?")
-                explanation = data.get("explanation", "")
-                st.markdown(f"""
-                <div style="background:#FFF7ED;border-left:4px solid #F59E0B;padding:12px;border-radius:8px;margin:8px 0;">
-                    <small style="color:#6B7280;">{ts}</small><br>
-                    <strong>💻 Code Snapshot (Q{q_num})</strong>
-                </div>
-                """, unsafe_allow_html=True)
-                if code_text:
-                    st.code(code_text, language="python")
-                if explanation:
-                    st.markdown(f"*Explanation:* {explanation[:300]}")
-
-            elif etype == "analysis":
-                analysis = data.get("analysis", {})
-                q_num = data.get("question_number", "?")
-                if isinstance(analysis, dict):
-                    score = analysis.get("overall_score", analysis.get("relevance_score", "N/A"))
-                    feedback = analysis.get("overall_feedback", analysis.get("feedback", ""))
-                    st.markdown(f"""
-                    <div style="background:#FDF2F8;border-left:4px solid #EC4899;padding:12px;border-radius:8px;margin:8px 0;">
-                        <small style="color:#6B7280;">{ts}</small><br>
-                        <strong>📊 AI Analysis (Q{q_num})</strong> — Score: {score}<br>
-                        {feedback[:300]}
-                    </div>
-                    """, unsafe_allow_html=True)
+    _recording_timeline(recording_events)
 
     st.info(f"📝 Total recording events: {len(recording_events)}")
 
@@ -401,37 +421,41 @@ st.markdown("---")
 st.markdown("### 🧠 AI Memory (What the AI Remembers About You)")
 st.markdown("The AI interviewer remembers facts you share across sessions to personalize your experience.")
 
-user_memories = db.get_user_memories(user_id)
-if user_memories:
-    category_icons = {
-        "personal": "👤",
-        "skill": "💻",
-        "preference": "⭐",
-        "interview_style": "🎯",
-        "general": "📝",
-    }
 
-    # Group by category
-    mem_by_cat = {}
-    for m in user_memories:
-        cat = m.get("category", "general")
-        if cat not in mem_by_cat:
-            mem_by_cat[cat] = []
-        mem_by_cat[cat].append(m)
-
-    for cat, items in mem_by_cat.items():
-        icon = category_icons.get(cat, "📝")
-        st.markdown(f"**{icon} {cat.replace('_', ' ').title()}**")
-        for item in items:
-            col1, col2, col3 = st.columns([2, 3, 1])
-            with col1:
-                st.markdown(f"`{item['memory_key']}`")
-            with col2:
-                st.markdown(item["memory_value"])
-            with col3:
-                if st.button("🗑️", key=f"del_mem_{item['id']}",
-                             help="Delete this memory"):
-                    db.delete_user_memory(user_id, item["memory_key"])
-                    st.rerun()
-else:
-    st.info("No memories yet. The AI will start remembering facts you share during interviews.")
+@st.fragment
+def _memory_block(user_id: int):
+    """Remembered facts with delete buttons; deleting reruns only this block."""
+    user_memories = db.get_user_memories(user_id)
+    if user_memories:
+        category_icons = {
+            "personal": "👤",
+            "skill": "💻",
+            "preference": "⭐",
+            "interview_style": "🎯",
+            "general": "📝",
+        }
+
+        # Group by category
+        mem_by_cat = defaultdict(list)
+        for m in user_memories:
+            mem_by_cat[m.get("category", "general")].append(m)
+
+        for cat, items in mem_by_cat.items():
+            icon = category_icons.get(cat, "📝")
+            st.markdown(f"**{icon} {cat.replace('_', ' ').title()}**")
+            for item in items:
+                col1, col2, col3 = st.columns([2, 3, 1])
+                with col1:
+                    st.markdown(f"`{item['memory_key']}`")
+                with col2:
+                    st.markdown(item["memory_value"])
+                with col3:
+                    if st.button("🗑️", key=f"del_mem_{item['id']}",
+                                 help="Delete this memory"):
+                        db.delete_user_memory(user_id, item["memory_key"])
+                        st.rerun(scope="fragment")
+    else:
+        st.info("No memories yet. The AI will start remembering facts you share during interviews.")
+
+
+_memory_block(user_id)
@@ -1,5 +1,7 @@
 """Activity Logs page for IntervueX."""
 
+import html
+
 import streamlit as st
 import database as db
 import auth_utils as auth
@@ -15,6 +17,53 @@ st.set_page_config(
 
 apply_global_css()
 
+
+TYPE_EMOJI = {
+    "authentication": "🔐",
+    "interview": "💼",
+    "resume": "📄",
+    "violation": "⚠️",
+    "system": "⚙️",
+    "general": "📝"
+}
+
+
+def _detail_view_html(logs: list, created_fmt: list) -> str:
+    """Render the detailed view as native <details> blocks in one HTML string."""
+    blocks = []
+    for log, created in zip(logs, created_fmt):
+        emoji = TYPE_EMOJI.get(log["action_type"], "📝")
+        user_agent = log.get("user_agent")
+        details = (
+            f'<div class="log-detail-body"><strong>Details:</strong><br>{html.escape(log["details"])}</div>'
+            if log.get("details") else ""
+        )
+        blocks.append(
+            f'<details class="log-detail">'
+            f'<summary>{emoji} {html.escape(log["action"])} - {created}</summary>'
+            f'<div class="log-detail-grid">'
+            f'<div><strong>Action Type:</strong> {html.escape(log["action_type"].title())}</div>'
+            f'<div><strong>Session ID:</strong> {log.get("session_id") or "N/A"}</div>'
+            f'<div><strong>Timestamp:</strong> {created}</div>'
+            f'<div><strong>IP Address:</strong> {html.escape(log.get("ip_address") or "N/A")}</div>'
+            f'<div><strong>Log ID:</strong> {log["id"]}</div>'
+            f'<div><strong>User Agent:</strong> {html.escape(user_agent[:50]) if user_agent else "N/A"}</div>'
+            f'</div>{details}</details>'
+        )
+    return "".join(blocks)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _logs_df(user_id: int, limit: int, action_type: str = None):
+    """Fetch the activity logs once per (user, limit, filter) and frame them."""
+    logs = db.get_user_activity_logs(user_id, limit=limit, action_type=action_type)
+    log_df = pd.DataFrame.from_records(
+        logs, columns=["created_at", "action", "action_type", "details", "session_id", "ip_address"]
+    )
+    log_df["created_at"] = pd.to_datetime(log_df["created_at"], errors="coerce")
+    return log_df, logs
+
+
 # Require authentication
 auth.require_auth()
 
@@ -41,6 +90,7 @@ with col2:
 
 with col3:
     if st.button("🔄 Refresh", use_container_width=True):
+        _logs_df.clear()
         st.rerun()
 
 # Map the filter to database values
@@ -56,29 +106,22 @@ action_type_map = {
 action_type = action_type_map[action_type_filter]
 
 # Get activity logs
-logs = db.get_user_activity_logs(
-    st.session_state.user_id, 
-    limit=limit,
-    action_type=action_type
-)
+log_df, logs = _logs_df(st.session_state.user_id, limit, action_type)
 
 if logs:
     st.markdown(f"### Found {len(logs)} activity records")
     st.divider()
     
     # Display logs in a table
-    log_data = []
-    for log in logs:
-        log_data.append({
-            "Time": log["created_at"],
-            "Action": log["action"],
-            "Type": log["action_type"].title(),
-            "Details": log.get("details", "—"),
-            "Session ID": log.get("session_id", "—"),
-            "IP Address": log.get("ip_address", "—")
-        })
-    
-    df = pd.DataFrame(log_data)
+    df = log_df.rename(columns={
+        "created_at": "Time",
+        "action": "Action",
+        "action_type": "Type",
+        "details": "Details",
+        "session_id": "Session ID",
+        "ip_address": "IP Address",
+    })
+    df["Type"] = df["Type"].str.title()
     
     # Display as a styled dataframe
     st.dataframe(
@@ -109,34 +152,9 @@ if logs:
     st.divider()
     st.markdown("### Detailed View")
     
-    for i, log in enumerate(logs[:20]):  # Show first 20 in detail
-        type_emoji = {
-            "authentication": "🔐",
-            "interview": "💼",
-            "resume": "📄",
-            "violation": "⚠️",
-            "system": "⚙️",
-            "general": "📝"
-        }
-        
-        emoji = type_emoji.get(log["action_type"], "📝")
-        
-        with st.expander(f"{emoji} {log['action']} - {log['created_at'][:19]}"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown(f"**Action Type:** {log['action_type'].title()}")
-                st.markdown(f"**Timestamp:** {log['created_at']}")
-                st.markdown(f"**Log ID:** {log['id']}")
-            
-            with col2:
-                st.markdown(f"**Session ID:** {log.get('session_id', 'N/A')}")
-                st.markdown(f"**IP Address:** {log.get('ip_address', 'N/A')}")
-                st.markdown(f"**User Agent:** {log.get('user_agent', 'N/A')[:50] if log.get('user_agent') else 'N/A'}")
-            
-            if log.get("details"):
-                st.markdown("**Details:**")
-                st.info(log["details"])
+    # Show first 20 in detail
+    created_fmt = log_df["created_at"].head(20).dt.strftime("%d %b %Y, %H:%M:%S").fillna("").tolist()
+    st.markdown(_detail_view_html(logs[:20], created_fmt), unsafe_allow_html=True)
     
     # Statistics
     st.divider()
@@ -145,10 +163,7 @@ if logs:
     col1, col2, col3, col4 = st.columns(4)
     
     # Count by type
-    type_counts = {}
-    for log in logs:
-        t = log["action_type"]
-        type_counts[t] = type_counts.get(t, 0) + 1
+    type_counts = log_df["action_type"].value_counts().to_dict()
     
     with col1:
         st.metric("Total Activities", len(logs))
@@ -182,5 +197,6 @@ with st.expander("🔧 Add Manual Log Entry (Testing)"):
             action_type=action_type_manual,
             details=details_manual
         )
+        _logs_df.clear()
         st.success(f"Log entry created with ID: {log_id}")
         st.rerun()
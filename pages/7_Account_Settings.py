@@ -4,7 +4,6 @@ import streamlit as st
 import database as db
 import auth_utils as auth
 from ui_utils import apply_global_css
-import pandas as pd
 
 # Page config
 st.set_page_config(
@@ -58,7 +57,7 @@ with st.form("change_password_form"):
             st.error("Password must be at least 6 characters")
         else:
             # Verify current password
-            if auth.login(user["email"], current_password):
+            if auth.verify_password(st.session_state.user_id, current_password):
                 # Update password
                 db.update_user_password(st.session_state.user_id, new_password)
                 db.log_activity(
@@ -77,59 +76,76 @@ st.divider()
 st.markdown("### 🔑 Active Sessions")
 st.markdown("Manage your active login sessions across devices")
 
-active_tokens = db.get_user_active_tokens(st.session_state.user_id)
-
-if active_tokens:
-    for token_data in active_tokens:
-        with st.expander(
-            f"Session from {token_data['created_at'][:19]} - "
-            f"Last used: {token_data['last_used'][:19]}"
-        ):
-            col1, col2 = st.columns([3, 1])
-            
-            with col1:
-                st.markdown(f"**Token Type:** {token_data['token_type'].title()}")
-                st.markdown(f"**Created:** {token_data['created_at'][:19]}")
-                st.markdown(f"**Expires:** {token_data['expires_at'][:19]}")
-                st.markdown(f"**Last Used:** {token_data['last_used'][:19]}")
-                if token_data.get('device_info'):
-                    st.markdown(f"**Device:** {token_data['device_info']}")
-                
-                # Show if this is the current session
-                if token_data['token'] == st.session_state.get('auth_token'):
-                    st.success("🟢 Current Session")
-            
-            with col2:
-                if st.button("Revoke", key=f"revoke_{token_data['id']}", type="secondary"):
-                    db.invalidate_auth_token(token_data['token'])
-                    db.log_activity(
-                        user_id=st.session_state.user_id,
-                        action="Session revoked",
-                        action_type="authentication",
-                        details=f"Revoked session from {token_data['created_at'][:19]}"
-                    )
-                    st.success("Session revoked")
-                    # If current session, logout
-                    if token_data['token'] == st.session_state.get('auth_token'):
-                        auth.logout()
-                        st.rerun()
-                    else:
-                        st.rerun()
-    
-    st.divider()
-    if st.button("🚫 Revoke All Sessions", type="secondary"):
-        db.invalidate_user_tokens(st.session_state.user_id)
-        db.log_activity(
-            user_id=st.session_state.user_id,
-            action="All sessions revoked",
-            action_type="authentication",
-            details="User revoked all active sessions"
+
+@st.fragment
+def _active_sessions_block():
+    """List and revoke login tokens; revoking another session reruns only this block."""
+    active_tokens = db.get_user_active_tokens(st.session_state.user_id)
+
+    if active_tokens:
+        import pandas as pd
+
+        current_token = st.session_state.get('auth_token')
+        tokens_df = pd.DataFrame.from_records(
+            active_tokens,
+            columns=["token_type", "created_at", "last_used", "expires_at", "device_info", "token"],
+        )
+        tokens_df["token_type"] = tokens_df["token_type"].str.title()
+        tokens_df["current"] = tokens_df["token"].eq(current_token).map({True: "🟢 Current", False: ""})
+        tokens_df = tokens_df.drop(columns="token").rename(columns={
+            "token_type": "Type",
+            "created_at": "Created",
+            "last_used": "Last Used",
+            "expires_at": "Expires",
+            "device_info": "Device",
+            "current": "Status",
+        })
+
+        event = st.dataframe(
+            tokens_df,
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key="active_tokens_table",
         )
-        st.success("All sessions revoked. You will be logged out.")
-        auth.logout()
-        st.rerun()
-else:
-    st.info("No active sessions found")
+
+        selected = [active_tokens[i] for i in event.selection.rows if i < len(active_tokens)]
+        if st.button("Revoke selected", type="secondary", disabled=not selected):
+            for token_data in selected:
+                db.invalidate_auth_token(token_data['token'])
+                db.log_activity(
+                    user_id=st.session_state.user_id,
+                    action="Session revoked",
+                    action_type="authentication",
+                    details=f"Revoked session from {token_data['created_at'][:19]}"
+                )
+            # If the current session was among them, logout
+            if any(t['token'] == current_token for t in selected):
+                auth.logout()
+                st.rerun()
+            else:
+                # Row positions shift once tokens are revoked; drop the stale selection
+                del st.session_state["active_tokens_table"]
+                st.rerun(scope="fragment")
+    
+        st.divider()
+        if st.button("🚫 Revoke All Sessions", type="secondary"):
+            db.invalidate_user_tokens(st.session_state.user_id)
+            db.log_activity(
+                user_id=st.session_state.user_id,
+                action="All sessions revoked",
+                action_type="authentication",
+                details="User revoked all active sessions"
+            )
+            st.success("All sessions revoked. You will be logged out.")
+            auth.logout()
+            st.rerun()
+    else:
+        st.info("No active sessions found")
+
+
+_active_sessions_block()
 
 st.divider()
 
@@ -142,17 +158,17 @@ stats = analytics["stats"]
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Sessions", stats.get("total", 0))
+    st.metric("Total Sessions", stats.get("total") or 0)
 
 with col2:
-    st.metric("Completed", stats.get("completed", 0))
+    st.metric("Completed", stats.get("completed") or 0)
 
 with col3:
     avg_score = stats.get("avg_overall", 0)
     st.metric("Avg Score", f"{avg_score:.1f}" if avg_score else "N/A")
 
 with col4:
-    st.metric("Violations", stats.get("total_violations", 0))
+    st.metric("Violations", stats.get("total_violations") or 0)
 
 st.divider()
 
@@ -79,6 +79,9 @@ VAPI_WIDGET_HTML = """<!DOCTYPE html>
 <meta charset="UTF-8"/>
 <meta name="viewport" content="width=device-width,initial-scale=1"/>
 <title>Vapi Voice Interview</title>
+<link rel="preconnect" href="https://esm.sh" crossorigin/>
+<link rel="preconnect" href="https://api.vapi.ai" crossorigin/>
+<link rel="modulepreload" href="https://esm.sh/@vapi-ai/web@2" crossorigin/>
 <style>
   * { box-sizing:border-box; margin:0; padding:0; }
   body {
@@ -165,7 +168,7 @@ VAPI_WIDGET_HTML = """<!DOCTYPE html>
 <div class="tip">Grant microphone access when prompted &bull; Chrome/Edge recommended</div>
 
 <script type="module">
-  import Vapi from 'https://esm.sh/@vapi-ai/web@latest';
+  import Vapi from 'https://esm.sh/@vapi-ai/web@2';
 
   const KEY = '%%VAPI_KEY%%';
   let vapi = null, active = false;
@@ -189,20 +192,38 @@ VAPI_WIDGET_HTML = """<!DOCTYPE html>
     active = false;
   }
 
-  function addLine(speaker, text) {
-    if (!text) return;
+  // Transcript lines are queued and appended once per animation frame, so a
+  // burst of transcript messages costs one layout instead of one per line
+  let lineQueue = [], flushScheduled = false;
+
+  function flushLines() {
+    flushScheduled = false;
     const box = $('transcriptBox');
     box.style.display = 'block';
-    const line = document.createElement('div');
-    line.style.marginBottom = '5px';
-    const isAI = speaker === 'assistant';
-    line.innerHTML =
-      '<strong style="color:' + (isAI ? '#4F46E5' : '#059669') + ';">' +
-      (isAI ? '&#129302; Alex' : '&#128100; You') + ':</strong> ' + text;
-    $('transcriptContent').appendChild(line);
+    const frag = document.createDocumentFragment();
+    for (const [speaker, text] of lineQueue) {
+      const line = document.createElement('div');
+      line.style.marginBottom = '5px';
+      const isAI = speaker === 'assistant';
+      line.innerHTML =
+        '<strong style="color:' + (isAI ? '#4F46E5' : '#059669') + ';">' +
+        (isAI ? '&#129302; Alex' : '&#128100; You') + ':</strong> ' + text;
+      frag.appendChild(line);
+    }
+    lineQueue = [];
+    $('transcriptContent').appendChild(frag);
     box.scrollTop = box.scrollHeight;
   }
 
+  function addLine(speaker, text) {
+    if (!text) return;
+    lineQueue.push([speaker, text]);
+    if (!flushScheduled) {
+      flushScheduled = true;
+      requestAnimationFrame(flushLines);
+    }
+  }
+
   async function startInterview() {
     if (!KEY) { showError('VAPI_PUBLIC_KEY not set. Edit .env and restart Streamlit.'); return; }
     $('startBtn').disabled = true;
@@ -244,7 +265,10 @@ VAPI_WIDGET_HTML = """<!DOCTYPE html>
       vapi.on('speech-end',   () => { if (active) setStatus('active', '&#127899; Listening to you\u2026'); });
 
       await vapi.start({
-        transcriber: { provider: 'deepgram', model: 'nova-2', language: 'en-US' },
+        // Endpoint and hand over turns sooner than the provider defaults
+        transcriber: { provider: 'deepgram', model: 'nova-2', language: 'en-US', endpointing: 150 },
+        startSpeakingPlan: { waitSeconds: 0.3, smartEndpointingEnabled: true },
+        stopSpeakingPlan: { numWords: 1, voiceSeconds: 0.1 },
         model: {
           provider: 'openai',
           model: 'gpt-4o-mini',
@@ -269,7 +293,7 @@ Guidelines:
 - Give brief verbal feedback after each answer.`
           }]
         },
-        voice: { provider: '11labs', voiceId: '21m00Tcm4TlvDq8ikWAM' },
+        voice: { provider: '11labs', voiceId: '21m00Tcm4TlvDq8ikWAM', optimizeStreamingLatency: 3 },
         name: 'IntervueX Voice Interviewer',
         firstMessage: "Hello! I'm Alex, your interviewer today. We'll cover some DSA and HR questions. Take your time before answering. Ready to begin?"
       });
@@ -298,41 +322,85 @@ Guidelines:
 # Serves the Vapi HTML at http://localhost:8503 so it has a real origin.
 # Without a real origin, Daily.co's postMessage is blocked by the browser.
 
-def _make_vapi_html(key: str) -> bytes:
-    return VAPI_WIDGET_HTML.replace("%%VAPI_KEY%%", key).encode("utf-8")
+@st.cache_resource(show_spinner=False)
+def _vapi_html(key: str) -> tuple:
+    """Widget HTML with the key filled in, built once per process.
+
+    Returns (plain bytes, gzipped bytes, ETag).
+    """
+    import gzip
+    import hashlib
+
+    html_bytes = VAPI_WIDGET_HTML.replace("%%VAPI_KEY%%", key).encode("utf-8")
+    etag = '"' + hashlib.md5(html_bytes).hexdigest() + '"'
+    return html_bytes, gzip.compress(html_bytes, 9), etag
 
 def _start_vapi_server(key: str, port: int) -> None:
     import http.server
+    import socket
 
-    html_bytes = _make_vapi_html(key)
+    html_bytes, gz_bytes, etag = _vapi_html(key)
 
     class Handler(http.server.BaseHTTPRequestHandler):
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
         def do_GET(self):  # noqa: N802
+            # Revalidate with the ETag instead of refetching on every iframe load.
+            # Not "immutable": the URL is fixed, so new HTML must still reach the browser.
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                return
+
+            body = html_bytes
             self.send_response(200)
             self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.send_header("Content-Length", str(len(html_bytes)))
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gz_bytes
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
             # Allow embedding in Streamlit's iframe
             self.send_header("X-Frame-Options", "ALLOWALL")
             self.send_header("Access-Control-Allow-Origin", "*")
             self.end_headers()
-            self.wfile.write(html_bytes)
+            self.wfile.write(body)
 
         def log_message(self, *_):  # suppress console noise
             pass
 
-    import socketserver
-    with socketserver.TCPServer(("localhost", port), Handler) as httpd:
+    class Server(http.server.ThreadingHTTPServer):
+        allow_reuse_address = True
+        daemon_threads = True
+
+    # Bind to 127.0.0.1 directly rather than resolving "localhost"
+    with Server(("127.0.0.1", port), Handler) as httpd:
         httpd.serve_forever()
 
 
-# Start the server once per Streamlit session (daemon threads die with the process)
+def _port_in_use(port: int) -> bool:
+    import socket
+
+    with socket.socket() as probe:
+        return probe.connect_ex(("127.0.0.1", port)) == 0
+
+
+# Start the server once per process (daemon threads die with the process).
+# Other sessions find the port already bound and skip straight to the iframe.
 if "vapi_server_started" not in st.session_state:
-    t = threading.Thread(
-        target=_start_vapi_server,
-        args=(VAPI_PUBLIC_KEY, VAPI_PORT),
-        daemon=True,
-    )
-    t.start()
+    if not _port_in_use(VAPI_PORT):
+        t = threading.Thread(
+            target=_start_vapi_server,
+            args=(VAPI_PUBLIC_KEY, VAPI_PORT),
+            daemon=True,
+        )
+        t.start()
     st.session_state.vapi_server_started = True
 
 # ── Embed widget via real URL (fixes postMessage null-origin error) ──────────
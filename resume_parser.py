@@ -1,20 +1,59 @@
 """Resume parser module for extracting text from uploaded resumes."""
 
 import io
-from PyPDF2 import PdfReader
+from contextlib import closing
+from typing import Iterator
+
+import streamlit as st
+from pypdf import PdfReader
 from ai_engine import extract_resume_skills
 
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from a PDF file."""
-    try:
+
+def _iter_pdf_pages(file_bytes: bytes) -> Iterator[str]:
+    """Yield the non-empty text of each page, using PDFium (C++) when installed."""
+    if PDFIUM_AVAILABLE:
+        pdf = pdfium.PdfDocument(file_bytes)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                if page_text:
+                    yield page_text
+        finally:
+            pdf.close()
+    else:
         reader = PdfReader(io.BytesIO(file_bytes))
-        text_parts = []
         for page in reader.pages:
-            page_text = page.extract_text()
+            page_text = page.extract_text(extraction_mode="plain")
             if page_text:
+                yield page_text
+
+
+def extract_text_from_pdf(file_bytes: bytes, max_chars: int = None) -> str:
+    """Extract text from a PDF file.
+
+    With max_chars, stops reading pages once that much text has been collected.
+    """
+    try:
+        with closing(_iter_pdf_pages(file_bytes)) as pages:
+            if max_chars is None:
+                return "\n".join(pages)
+            text_parts = []
+            total = 0
+            for page_text in pages:
                 text_parts.append(page_text)
-        return "\n".join(text_parts)
+                total += len(page_text) + 1
+                if total > max_chars:
+                    break
+            return "\n".join(text_parts)
     except Exception as e:
         return f"Error extracting PDF text: {str(e)}"
 
@@ -27,15 +66,20 @@ def extract_text_from_txt(file_bytes: bytes) -> str:
         return file_bytes.decode("latin-1")
 
 
-def parse_resume(file_bytes: bytes, filename: str) -> dict:
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def parse_resume(file_bytes: bytes, filename: str, max_chars: int = 20_000) -> dict:
     """Parse a resume file and extract structured information.
+
+    Only the first max_chars characters are read from PDFs and sent to the AI.
+    Results are cached on the file content, so re-analyzing the same upload
+    skips both the PDF decode and the AI call.
     
     Returns:
         dict with keys: raw_text, skills, experience, education, summary, etc.
     """
     # Extract raw text based on file type
     if filename.lower().endswith(".pdf"):
-        raw_text = extract_text_from_pdf(file_bytes)
+        raw_text = extract_text_from_pdf(file_bytes, max_chars=max_chars)
     elif filename.lower().endswith((".txt", ".text")):
         raw_text = extract_text_from_txt(file_bytes)
     else:
@@ -54,7 +98,7 @@ def parse_resume(file_bytes: bytes, filename: str) -> dict:
         }
 
     # Use AI to extract structured information
-    ai_result = extract_resume_skills(raw_text)
+    ai_result = extract_resume_skills(raw_text[:max_chars])
     ai_result["raw_text"] = raw_text
 
     return ai_result
@@ -1,7 +1,9 @@
+from functools import lru_cache
+
 import streamlit as st
 
-def apply_global_css():
-    st.markdown("""
+
+_GLOBAL_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800&display=swap');
     
@@ -116,6 +118,101 @@ def apply_global_css():
         z-index: 999999 !important;
         right: 0 !important;
     }
+
+    /* Interview conversation and question cards */
+    .interviewer-msg {
+        background: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid rgba(128, 128, 128, 0.2);
+        border-left: 4px solid #818CF8;
+        padding: 16px 20px;
+        border-radius: 12px;
+        margin: 10px 0;
+    }
+    .candidate-msg {
+        background: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid rgba(128, 128, 128, 0.2);
+        border-left: 4px solid #34D399;
+        padding: 16px 20px;
+        border-radius: 12px;
+        margin: 10px 0;
+    }
+    .system-msg {
+        background: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid rgba(128, 128, 128, 0.2);
+        border-left: 4px solid #F472B6;
+        padding: 12px 16px;
+        border-radius: 12px;
+        margin: 8px 0;
+        font-size: 0.9rem;
+        opacity: 0.9;
+    }
+    .question-card {
+        background: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid #4F46E5;
+        border-radius: 16px;
+        padding: 24px;
+        margin: 15px 0;
+    }
+    .hr-question-card {
+        background: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid #EC4899;
+        border-radius: 16px;
+        padding: 24px;
+        margin: 15px 0;
+    }
+    .log-detail {
+        border: 1px solid #E5E7EB;
+        border-radius: 8px;
+        padding: 10px 14px;
+        margin: 6px 0;
+    }
+    .log-detail summary {
+        cursor: pointer;
+        font-weight: 600;
+    }
+    .log-detail-grid {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 4px 24px;
+        margin-top: 10px;
+    }
+    .log-detail-body {
+        margin-top: 10px;
+        padding: 10px;
+        background: #EFF6FF;
+        border-radius: 6px;
+    }
+    .score-badge {
+        display: inline-block;
+        padding: 4px 12px;
+        border-radius: 20px;
+        font-weight: 600;
+        font-size: 0.85rem;
+    }
 </style>
 <div class="fixed-logo">IntervueX</div>
-    """, unsafe_allow_html=True)
+"""
+
+
+def apply_global_css():
+    # Emitted on every run: Streamlit drops elements a rerun does not emit,
+    # so skipping this after the first run would unstyle the page.
+    st.markdown(_GLOBAL_CSS, unsafe_allow_html=True)
+
+
+@lru_cache(maxsize=512)
+def render_chat_message(role: str, content: str) -> str:
+    """Render one interview conversation message as a styled HTML block.
+
+    Cached at module level, so it survives page reruns.
+    """
+    if role == "interviewer":
+        return f'<div class="interviewer-msg">🤖 <strong>Interviewer:</strong><br>{content}</div>'
+    if role == "candidate":
+        return f'<div class="candidate-msg">👤 <strong>You:</strong><br>{content}</div>'
+    return f'<div class="system-msg">ℹ️ {content}</div>'
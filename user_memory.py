@@ -6,9 +6,64 @@ and previously shared information.
 """
 
 import json
+import re
+from collections import defaultdict
+
 import database as db
 
 
+# A reply wrapped in a ``` or ```json code fence
+_FENCE_RE = re.compile(r"^```(?:json)?\s*\n?(.*?)\n?```$", re.S)
+
+_CATEGORY_LABELS = {
+    "personal": "Personal Information",
+    "skill": "Skills & Technical Background",
+    "preference": "Preferences",
+    "interview_style": "Interview Style",
+    "general": "General Notes",
+}
+
+# user_id -> (db.user_memory_version at build time, context string)
+_MEMORY_CONTEXT_CACHE = {}
+
+# Skip the AI extraction call when the heuristics already found this many
+# facts, or when the conversation is shorter than this many characters
+HEURISTIC_FACTS_ENOUGH = 5
+MIN_AI_CONVERSATION_CHARS = 500
+
+# Heuristic fact patterns: (compiled regex, memory key, category, value formatter).
+# Group 1 of each regex holds the value.
+_FACT_PATTERNS = [
+    # Weight
+    (re.compile(r'(?:my |i )?weigh(?:t is|s?) (\d+\s*(?:kg|lbs?|pounds?|kilos?))'),
+     "weight", "personal", str),
+    # Height
+    (re.compile(r'(?:my |i am |i\'m )?(?:height is )?(\d+\s*(?:cm|feet|ft|inches|in|\'|"))'),
+     "height", "personal", str),
+    # Age
+    (re.compile(r'(?:i am |i\'m |my age is )(\d{1,2})\s*(?:years? old|yrs?)?'),
+     "age", "personal", lambda v: v + " years old"),
+    # Years of experience
+    (re.compile(r'(\d+)\s*(?:\+\s*)?years?\s*(?:of\s*)?(?:experience|exp)'),
+     "years_of_experience", "skill", lambda v: v + " years"),
+    # Favorite/preferred language
+    (re.compile(r'(?:my )?(?:favorite|preferred|favourite)\s*(?:programming\s*)?language\s*is\s*(\w+)'),
+     "favorite_language", "preference", str),
+    # College/university
+    (re.compile(r'(?:i (?:study|studied|go|went) (?:at|to)|i\'m (?:at|from)|my college is|i attend)\s+(.+?)(?:\.|,|$)'),
+     "college", "personal", lambda v: v[:100]),
+    # Name preference
+    (re.compile(r'(?:call me|my name is|i\'m called|i go by)\s+(\w+)'),
+     "preferred_name", "personal", str),
+    # Current role/job
+    (re.compile(r'(?:i work as|i\'m a|i am a|my role is|my job is|i\'m currently a)\s+(.+?)(?:\.|,|$)'),
+     "current_role", "skill", lambda v: v[:100]),
+    # Company
+    (re.compile(r'(?:i work at|i\'m at|i am at|my company is|i work for)\s+(.+?)(?:\.|,|$)'),
+     "current_company", "skill", lambda v: v[:100]),
+]
+
+
 def extract_memories_from_conversation(user_id: int, session_id: int,
                                         conversation: list) -> list:
     """Extract memorable facts from a conversation using AI.
@@ -19,52 +74,83 @@ def extract_memories_from_conversation(user_id: int, session_id: int,
     Returns a list of extracted memory dicts.
     """
     extracted = []
+    pending = []
 
-    for msg in conversation:
-        if msg.get("role") != "candidate":
-            continue
-
-        content = msg.get("content", "").strip()
-        if not content or len(content) < 10:
-            continue
-
+    for content in _candidate_texts(conversation):
         # Use simple heuristic extraction for common patterns
         # This avoids an extra API call and works for most cases
         facts = _extract_facts_heuristic(content)
         for key, value, category in facts:
-            db.save_user_memory(
-                user_id=user_id,
-                memory_key=key,
-                memory_value=value,
-                category=category,
-                source_session_id=session_id,
-            )
+            pending.append((key, value, category))
             extracted.append({"key": key, "value": value, "category": category})
 
+    # One transaction for every fact found in the conversation
+    if pending:
+        db.bulk_save_user_memories(user_id, pending, source_session_id=session_id)
     return extracted
 
 
 def extract_memories_with_ai(user_id: int, session_id: int,
                               conversation: list):
-    """Extract memories using AI analysis (called after interview ends).
+    """Extract memories from the full conversation (called after interview ends).
+
+    Runs the heuristic patterns over every candidate turn and, unless they
+    already found enough or the conversation is too short to be worth it,
+    makes one Groq call over the whole conversation. All facts are saved in
+    a single transaction; facts found by the AI take precedence over
+    heuristic ones with the same key.
+    """
+    facts = _heuristic_scan(conversation)
+
+    conv_chars = sum(len(msg.get("content", "")) for msg in conversation)
+    if len(facts) < HEURISTIC_FACTS_ENOUGH and conv_chars >= MIN_AI_CONVERSATION_CHARS:
+        for key, value, category in _extract_facts_ai(conversation):
+            facts[key] = (value, category)
+
+    if facts:
+        db.bulk_save_user_memories(
+            user_id,
+            [(key, value, category) for key, (value, category) in facts.items()],
+            source_session_id=session_id,
+        )
+    return [{"key": key, "value": value, "category": category}
+            for key, (value, category) in facts.items()]
+
+
+def _candidate_texts(conversation: list) -> list:
+    """Stripped candidate turns long enough to hold a fact (10+ chars)."""
+    texts = (m.get("content", "").strip() for m in conversation if m.get("role") == "candidate")
+    return [t for t in texts if len(t) >= 10]
 
-    This uses the Groq API to intelligently extract facts from the
-    full conversation. Called once when the interview session ends.
+
+def _heuristic_scan(conversation: list) -> dict:
+    """Run the heuristic patterns over every candidate turn.
+
+    Returns {key: (value, category)}; later turns win on duplicate keys.
+    """
+    facts = {}
+    for content in _candidate_texts(conversation):
+        for key, value, category in _extract_facts_heuristic(content):
+            facts[key] = (value, category)
+    return facts
+
+
+def _extract_facts_ai(conversation: list) -> list:
+    """Extract facts from a conversation with one Groq call.
+
+    Returns list of (key, value, category) tuples.
     """
     try:
-        from ai_engine import _chat
+        from ai_engine import _chat, _json_loads
     except Exception:
         return []
 
     # Build conversation text
-    conv_text = ""
-    for msg in conversation:
-        role = msg.get("role", "unknown")
-        content = msg.get("content", "")
-        conv_text += f"{role}: {content}\n"
+    conv_text = "\n".join(f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in conversation)
 
     if len(conv_text) < 50:
         return []
+    snippet = conv_text[:3000]
 
     messages = [
         {
@@ -92,41 +178,49 @@ Return ONLY valid JSON."""
         },
         {
             "role": "user",
-            "content": f"Extract key facts about the candidate from this interview conversation:\n\n{conv_text[:3000]}"
+            "content": f"Extract key facts about the candidate from this interview conversation:\n\n{snippet}"
         }
     ]
 
     try:
         result = _chat(messages, temperature=0.2, max_tokens=1000)
-        if result.startswith("```"):
-            result = result.split("\n", 1)[1].rsplit("```", 1)[0]
-        facts = json.loads(result)
-
-        extracted = []
-        for fact in facts:
-            if isinstance(fact, dict) and "key" in fact and "value" in fact:
-                category = fact.get("category", "general")
-                if category not in ("general", "preference", "skill", "personal", "interview_style"):
-                    category = "general"
-                db.save_user_memory(
-                    user_id=user_id,
-                    memory_key=fact["key"],
-                    memory_value=fact["value"],
-                    category=category,
-                    source_session_id=session_id,
-                )
-                extracted.append(fact)
-        return extracted
     except Exception:
         return []
 
+    fenced = _FENCE_RE.match(result.strip())
+    try:
+        parsed = _json_loads(fenced.group(1) if fenced else result)
+    except json.JSONDecodeError:
+        return []
+
+    facts = []
+    for fact in parsed if isinstance(parsed, list) else []:
+        if isinstance(fact, dict) and "key" in fact and "value" in fact:
+            category = fact.get("category", "general")
+            if category not in ("general", "preference", "skill", "personal", "interview_style"):
+                category = "general"
+            facts.append((fact["key"], fact["value"], category))
+    return facts
+
 
 def get_memory_context_for_ai(user_id: int) -> str:
     """Build a context string of user memories to inject into AI prompts.
 
     Returns a formatted string that can be added to the system prompt
-    so the AI remembers everything about the user.
+    so the AI remembers everything about the user. The string is cached
+    per user until one of their memories is written or deleted.
     """
+    version = db.user_memory_version(user_id)
+    cached = _MEMORY_CONTEXT_CACHE.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    context = _build_memory_context(user_id)
+    _MEMORY_CONTEXT_CACHE[user_id] = (version, context)
+    return context
+
+
+def _build_memory_context(user_id: int) -> str:
+    """Fetch a user's memories and format them as a prompt block."""
     memories = db.get_user_memories(user_id)
     if not memories:
         return ""
@@ -134,25 +228,18 @@ def get_memory_context_for_ai(user_id: int) -> str:
     context = "\n=== REMEMBERED INFORMATION ABOUT THIS CANDIDATE ===\n"
     context += "You have interviewed this candidate before. Here is what you remember:\n"
 
-    categories = {}
+    categories = defaultdict(list)
     for m in memories:
-        cat = m.get("category", "general")
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(f"- {m['memory_key']}: {m['memory_value']}")
-
-    category_labels = {
-        "personal": "Personal Information",
-        "skill": "Skills & Technical Background",
-        "preference": "Preferences",
-        "interview_style": "Interview Style",
-        "general": "General Notes",
-    }
-
-    for cat, items in categories.items():
-        label = category_labels.get(cat, cat.title())
+        categories[m.get("category", "general")].append(f"- {m['memory_key']}: {m['memory_value']}")
+
+    # Known categories in a fixed order, then any others, so the block is
+    # stable across calls
+    ordered = [cat for cat in _CATEGORY_LABELS if cat in categories]
+    ordered += [cat for cat in categories if cat not in _CATEGORY_LABELS]
+    for cat in ordered:
+        label = _CATEGORY_LABELS.get(cat, cat.title())
         context += f"\n{label}:\n"
-        context += "\n".join(items) + "\n"
+        context += "\n".join(categories[cat]) + "\n"
 
     context += "\nIMPORTANT: Use this information naturally. Do NOT ask about things you already know.\n"
     context += "Reference remembered facts when relevant to make the interview feel personalized.\n"
@@ -166,55 +253,10 @@ def _extract_facts_heuristic(text: str) -> list:
 
     Returns list of (key, value, category) tuples.
     """
-    facts = []
     text_lower = text.lower()
-
-    # Common patterns for personal info
-    import re
-
-    # Weight
-    weight_match = re.search(r'(?:my |i )?weigh(?:t is|s?) (\d+\s*(?:kg|lbs?|pounds?|kilos?))', text_lower)
-    if weight_match:
-        facts.append(("weight", weight_match.group(1).strip(), "personal"))
-
-    # Height
-    height_match = re.search(r'(?:my |i am |i\'m )?(?:height is )?(\d+\s*(?:cm|feet|ft|inches|in|\'|"))', text_lower)
-    if height_match:
-        facts.append(("height", height_match.group(1).strip(), "personal"))
-
-    # Age
-    age_match = re.search(r'(?:i am |i\'m |my age is )(\d{1,2})\s*(?:years? old|yrs?)?', text_lower)
-    if age_match:
-        facts.append(("age", age_match.group(1).strip() + " years old", "personal"))
-
-    # Years of experience
-    exp_match = re.search(r'(\d+)\s*(?:\+\s*)?years?\s*(?:of\s*)?(?:experience|exp)', text_lower)
-    if exp_match:
-        facts.append(("years_of_experience", exp_match.group(1).strip() + " years", "skill"))
-
-    # Favorite/preferred language
-    lang_match = re.search(r'(?:my )?(?:favorite|preferred|favourite)\s*(?:programming\s*)?language\s*is\s*(\w+)', text_lower)
-    if lang_match:
-        facts.append(("favorite_language", lang_match.group(1).strip(), "preference"))
-
-    # College/university
-    college_match = re.search(r'(?:i (?:study|studied|go|went) (?:at|to)|i\'m (?:at|from)|my college is|i attend)\s+(.+?)(?:\.|,|$)', text_lower)
-    if college_match:
-        facts.append(("college", college_match.group(1).strip()[:100], "personal"))
-
-    # Name preference
-    name_match = re.search(r'(?:call me|my name is|i\'m called|i go by)\s+(\w+)', text_lower)
-    if name_match:
-        facts.append(("preferred_name", name_match.group(1).strip(), "personal"))
-
-    # Current role/job
-    role_match = re.search(r'(?:i work as|i\'m a|i am a|my role is|my job is|i\'m currently a)\s+(.+?)(?:\.|,|$)', text_lower)
-    if role_match:
-        facts.append(("current_role", role_match.group(1).strip()[:100], "skill"))
-
-    # Company
-    company_match = re.search(r'(?:i work at|i\'m at|i am at|my company is|i work for)\s+(.+?)(?:\.|,|$)', text_lower)
-    if company_match:
-        facts.append(("current_company", company_match.group(1).strip()[:100], "skill"))
-
+    facts = []
+    for pattern, key, category, fmt in _FACT_PATTERNS:
+        match = pattern.search(text_lower)
+        if match:
+            facts.append((key, fmt(match.group(1).strip()), category))
     return facts
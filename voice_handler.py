@@ -1,8 +1,14 @@
 """Voice handler module using Deepgram for Speech-to-Text and gTTS for Text-to-Speech."""
 
+import atexit
 import os
-import io
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator
+
 import httpx
+import numpy as np
 from dotenv import load_dotenv
 
 try:
@@ -11,6 +17,18 @@ try:
 except ImportError:
     GTTS_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 load_dotenv()
 
 # Try to get API key from environment or Streamlit secrets
@@ -24,13 +42,66 @@ if not DEEPGRAM_API_KEY:
 
 DEEPGRAM_URL = "https://api.deepgram.com/v1/listen"
 
-
-def transcribe_audio(audio_bytes: bytes, mimetype: str = "audio/wav") -> dict:
-    """Transcribe audio bytes using Deepgram API.
+# Shared client so repeated transcriptions reuse the pooled TLS connection;
+# with HTTP/2, concurrent transcriptions share a single connection
+_http_client = httpx.Client(
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+    http2=HTTP2_AVAILABLE,
+    headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"} if DEEPGRAM_API_KEY else None,
+)
+atexit.register(_http_client.close)
+
+
+# Full feature set, needed for speech-pattern analytics
+_TRANSCRIBE_PARAMS = {
+    "model": "nova-2",
+    "smart_format": "true",
+    "punctuate": "true",
+    "diarize": "false",
+    "language": "en",
+    "filler_words": "true",
+}
+
+# Transcript only: Deepgram skips formatting and filler-word detection
+_TRANSCRIBE_FAST_PARAMS = {
+    "model": "nova-2",
+    "punctuate": "true",
+    "diarize": "false",
+    "language": "en",
+}
+
+
+def transcribe_audio(audio_bytes, mimetype: str = "audio/wav") -> dict:
+    """Transcribe audio using Deepgram API.
+
+    audio_bytes may be raw bytes or an in-memory file such as Streamlit's
+    UploadedFile. getvalue() on an unmodified BytesIO hands back its
+    underlying bytes object, so the recording is never copied.
     
     Returns:
         dict with 'transcript', 'confidence', and 'words' keys.
     """
+    return _transcribe(audio_bytes, mimetype, _TRANSCRIBE_PARAMS)
+
+
+def transcribe_audio_fast(audio_bytes, mimetype: str = "audio/wav") -> dict:
+    """Transcribe audio for callers that only need the text.
+
+    Requests fewer Deepgram features than transcribe_audio, so the call is
+    cheaper and quicker. 'words' is always empty; use transcribe_audio when
+    the result feeds analyze_speech_patterns.
+    """
+    result = _transcribe(audio_bytes, mimetype, _TRANSCRIBE_FAST_PARAMS)
+    result["words"] = []
+    return result
+
+
+def _transcribe(audio_bytes, mimetype: str, params: dict) -> dict:
+    """POST audio to Deepgram with the given query params."""
+    if hasattr(audio_bytes, "getvalue"):
+        audio_bytes = audio_bytes.getvalue()
+
     if not DEEPGRAM_API_KEY:
         return {
             "transcript": "",
@@ -39,30 +110,19 @@ def transcribe_audio(audio_bytes: bytes, mimetype: str = "audio/wav") -> dict:
             "error": "Deepgram API key not configured"
         }
 
-    headers = {
-        "Authorization": f"Token {DEEPGRAM_API_KEY}",
-        "Content-Type": mimetype,
-    }
-
-    params = {
-        "model": "nova-2",
-        "smart_format": "true",
-        "punctuate": "true",
-        "diarize": "false",
-        "language": "en",
-        "filler_words": "true",
-    }
+    # Authorization is set on the shared client
+    headers = {"Content-Type": mimetype}
 
     try:
-        response = httpx.post(
+        response = _http_client.post(
             DEEPGRAM_URL,
             headers=headers,
             params=params,
             content=audio_bytes,
-            timeout=30.0,
         )
         response.raise_for_status()
-        data = response.json()
+        # orjson parses the raw bytes directly, skipping the str decode
+        data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
 
         result = data.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0]
 
@@ -88,6 +148,11 @@ def transcribe_audio(audio_bytes: bytes, mimetype: str = "audio/wav") -> dict:
         }
 
 
+_FILLER_WORDS = frozenset({"um", "uh", "like", "you know", "basically", "actually",
+                           "so", "well", "I mean", "right", "okay"})
+_PUNCT_TRANS = str.maketrans("", "", ".,!?")
+
+
 def analyze_speech_patterns(words: list) -> dict:
     """Analyze speech patterns from word-level data.
     
@@ -103,9 +168,6 @@ def analyze_speech_patterns(words: list) -> dict:
             "avg_pause_duration": 0,
         }
 
-    filler_words = {"um", "uh", "like", "you know", "basically", "actually",
-                    "so", "well", "I mean", "right", "okay"}
-
     total_words = len(words)
     if total_words == 0:
         return {
@@ -123,26 +185,22 @@ def analyze_speech_patterns(words: list) -> dict:
 
     wpm = (total_words / duration * 60) if duration > 0 else 0
 
-    fillers_found = []
-    for w in words:
-        word_text = w.get("word", "").lower().strip(".,!?")
-        if word_text in filler_words:
-            fillers_found.append(word_text)
+    fillers_found = [t for t in (w.get("word", "").lower().translate(_PUNCT_TRANS) for w in words)
+                     if t in _FILLER_WORDS]
 
-    # Detect pauses (gaps > 1 second between words)
-    pauses = []
-    for i in range(1, len(words)):
-        gap = words[i].get("start", 0) - words[i - 1].get("end", 0)
-        if gap > 1.0:
-            pauses.append(gap)
+    # Detect pauses (gaps > 1 second between words) in one vectorized pass
+    starts = np.fromiter((w.get("start", 0) for w in words), dtype=np.float64, count=total_words)
+    ends = np.fromiter((w.get("end", 0) for w in words), dtype=np.float64, count=total_words)
+    gaps = starts[1:] - ends[:-1]
+    pauses = gaps[gaps > 1.0]
 
     return {
         "speaking_pace_wpm": round(wpm),
         "filler_word_count": len(fillers_found),
         "filler_words_found": fillers_found,
         "total_duration_seconds": round(duration, 1),
-        "pause_count": len(pauses),
-        "avg_pause_duration": round(sum(pauses) / len(pauses), 1) if pauses else 0,
+        "pause_count": int(pauses.size),
+        "avg_pause_duration": round(float(pauses.mean()), 1) if pauses.size else 0,
     }
 
 
@@ -159,16 +217,43 @@ def synthesize_speech(text: str, voice: str = "default") -> dict:
         return {"audio": b"", "error": "No text provided for synthesis"}
 
     try:
-        tts = gTTS(text=text, lang="en", slow=False)
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        audio_bytes = audio_buffer.read()
-        return {"audio": audio_bytes, "error": None}
+        # MP3 is frame-based, so per-sentence clips concatenate into one playable file
+        return {"audio": b"".join(synthesize_speech_stream(text)), "error": None}
     except Exception as e:
         return {"audio": b"", "error": f"TTS error: {str(e)}"}
 
 
+def synthesize_speech_stream(text: str) -> Iterator[bytes]:
+    """Yield MP3 bytes sentence by sentence, in order.
+
+    All sentences are synthesized concurrently, so the first clip is ready
+    after one short round trip instead of after the whole text. Raises on
+    TTS failure.
+    """
+    sentences = [part for part in _SENTENCE_RE.split(text.strip()) if part]
+    if len(sentences) <= 1:
+        yield _synthesize_mp3(text.strip(), "en")
+        return
+    futures = [_tts_executor.submit(_synthesize_mp3, sentence, "en") for sentence in sentences]
+    for future in futures:
+        yield future.result()
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+
+
+@lru_cache(maxsize=256)
+def _synthesize_mp3(text: str, lang: str) -> bytes:
+    """gTTS round trip, cached per process.
+
+    Greetings, instructions and re-asked questions repeat constantly;
+    failures raise and so are never cached.
+    """
+    tts = gTTS(text=text, lang=lang, slow=False)
+    return b"".join(tts.stream())
+
+
 def get_browser_stt_component() -> str:
     """Return an HTML/JS component that uses the Web Speech API for speech recognition.
 
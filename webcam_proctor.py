@@ -8,19 +8,45 @@ Detects:
 Violations are recorded in the database via Python-side query param sync.
 """
 
+from functools import lru_cache
+
 import streamlit as st
 import streamlit.components.v1 as components
 import database as db
 
-
-def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
-    """Inject webcam proctoring component into the interview page.
-
-    Args:
-        session_id: Current interview session ID
-        sensitivity: Detection sensitivity - 'low', 'medium', or 'high'
+# Seconds between checks for violations reported by the proctor JS
+PROCTOR_SYNC_INTERVAL = 5
+
+# Detection thresholds per sensitivity level (delays in ms)
+SENSITIVITY_THRESHOLDS = {
+    "low":    {"no_face_delay": 8000, "multi_face_delay": 5000, "gaze_threshold": 0.35},
+    "medium": {"no_face_delay": 5000, "multi_face_delay": 3000, "gaze_threshold": 0.25},
+    "high":   {"no_face_delay": 3000, "multi_face_delay": 2000, "gaze_threshold": 0.15},
+}
+
+# face-api model weights
+FACE_MODEL_URL = "https://cdn.jsdelivr.net/gh/justadudewhohacks/face-api.js@master/weights"
+
+# Files face-api fetches for the tiny detector and tiny landmark nets
+_MODEL_FILES = (
+    "tiny_face_detector_model-weights_manifest.json",
+    "tiny_face_detector_model-shard1",
+    "face_landmark_68_tiny_model-weights_manifest.json",
+    "face_landmark_68_tiny_model-shard1",
+)
+_MODEL_PRELOAD_LINKS = "\n    ".join(
+    f'<link rel="preload" href="{FACE_MODEL_URL}/{name}" as="fetch" crossorigin>'
+    for name in _MODEL_FILES
+)
+
+
+@st.fragment(run_every=PROCTOR_SYNC_INTERVAL)
+def _sync_proctor_violations(session_id: int):
+    """Write proctor violations reported by JS via query params to the DB.
+
+    Runs as a fragment on a timer, so new violations are recorded without a
+    full page rerun that would tear down the webcam component.
     """
-    # --- Python-side: read proctor violations written by JS via query params ---
     qp = st.query_params
     js_proctor_count = int(qp.get("proctor_violation", 0) or 0)
     proctor_type = qp.get("proctor_type", "webcam") or "webcam"
@@ -30,26 +56,34 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
     last_seen = st.session_state.get(key, 0)
 
     if js_proctor_count > last_seen:
-        for _ in range(js_proctor_count - last_seen):
-            try:
-                db.increment_tab_violations(
-                    session_id,
-                    violation_type=proctor_type,
-                    details="Webcam proctoring violation"
-                )
-            except Exception:
-                pass
+        try:
+            db.add_tab_violations(
+                session_id,
+                proctor_type,
+                js_proctor_count - last_seen,
+                details="Webcam proctoring violation"
+            )
+        except Exception:
+            pass
         st.session_state[key] = js_proctor_count
 
-    # --- Sensitivity thresholds ---
-    thresholds = {
-        "low":    {"no_face_delay": 8000, "multi_face_delay": 5000, "gaze_threshold": 0.35},
-        "medium": {"no_face_delay": 5000, "multi_face_delay": 3000, "gaze_threshold": 0.25},
-        "high":   {"no_face_delay": 3000, "multi_face_delay": 2000, "gaze_threshold": 0.15},
-    }
-    t = thresholds.get(sensitivity, thresholds["medium"])
 
-    proctor_html = f"""
+def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
+    """Inject webcam proctoring component into the interview page.
+
+    Args:
+        session_id: Current interview session ID
+        sensitivity: Detection sensitivity - 'low', 'medium', or 'high'
+    """
+    _sync_proctor_violations(session_id)
+    components.html(_render_proctor_html(session_id, sensitivity), height=0)
+
+
+@lru_cache(maxsize=64)
+def _render_proctor_html(session_id: int, sensitivity: str) -> str:
+    """Build the proctor component HTML; identical on every rerun of a session."""
+    t = SENSITIVITY_THRESHOLDS.get(sensitivity, SENSITIVITY_THRESHOLDS["medium"])
+    return f"""
     <!-- ===== Webcam preview widget ===== -->
     <div id="proctor-container" style="position:fixed;top:10px;left:10px;z-index:99998;">
         <div id="proctor-preview"
@@ -81,8 +115,9 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
     </div>
 
     <!-- ===== Violation alert overlay ===== -->
-    <div id="proctor-alert"
-         style="display:none;position:fixed;top:0;left:0;width:100vw;height:100vh;
+    <style>#proctor-alert:not([hidden]) {{ display:flex; }}</style>
+    <div id="proctor-alert" hidden
+         style="position:fixed;top:0;left:0;width:100vw;height:100vh;
                 background:rgba(220,38,38,0.95);z-index:999999;
                 align-items:center;justify-content:center;flex-direction:column;
                 color:white;font-family:'Segoe UI',sans-serif;">
@@ -103,6 +138,11 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
         </div>
     </div>
 
+    <!-- Start the model weight downloads in parallel with the script and
+         the camera permission prompt, instead of after them -->
+    <link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
+    {_MODEL_PRELOAD_LINKS}
+
     <!-- face-api.js from CDN -->
     <script src="https://cdn.jsdelivr.net/npm/face-api.js@0.22.2/dist/face-api.min.js"></script>
 
@@ -112,7 +152,12 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
         const NO_FACE_DELAY   = {t['no_face_delay']};
         const MULTI_FACE_DELAY = {t['multi_face_delay']};
         const GAZE_THRESHOLD  = {t['gaze_threshold']};
-        const VIOLATION_COOLDOWN = 12000; // ms between same violation type
+        const EYE_FIRST = 36, EYE_LAST = 47;  // both eyes in the 68-point landmarks
+        // Per-type cooldown doubles on each alert, so a persistent behaviour
+        // is alerted on ever more rarely; it resets after a quiet minute
+        const BASE_COOLDOWN   = 12000;
+        const MAX_COOLDOWN    = 120000;
+        const COOLDOWN_RESET  = 60000;
 
         let proctorViolations = parseInt(
             localStorage.getItem('proctor_violations_' + SESSION_ID) || '0'
@@ -120,13 +165,33 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
         let video = null;
         let canvas = null;
         let ctx = null;
+        let canvasW = 0, canvasH = 0;   // current canvas backing-store size
         let isMinimized = false;
-        let noFaceTimer = null;
-        let multiFaceTimer = null;
+        // Start of the current no-face / multi-face stretch (0 = none) and
+        // whether it has already been reported
+        let noFaceSince = 0, noFaceFired = false;
+        let multiFaceSince = 0, multiFaceFired = false;
         let modelsLoaded = false;
-        let detectionInterval = null;
-        let lastViolationType = '';
-        let lastViolationTime = 0;
+        let detectionTimer = null;
+        let detectionInFlight = false;
+        // ms between the end of one detection and the next: fast while the
+        // picture is changing, slow once it has been calm for a while
+        const DETECTION_FAST   = 750;
+        const DETECTION_SLOW   = 3000;
+        const STABLE_AFTER     = 10000;
+        let calm = false;          // last pass saw one face looking at the screen
+        let stableSince = 0;
+        let detectorOptions = null;
+        const BOX_STILL_PX = 4;        // summed box movement still counted as "not moved"
+        const LANDMARK_MAX_REUSE = 4;  // passes before cached landmarks are refreshed
+        let lastBox = null;
+        let lastLandmarks = null;
+        let landmarkReuses = 0;
+        const cooldowns   = {{}};  // type -> current cooldown (ms)
+        const nextAllowed = {{}};  // type -> earliest time of the next alert
+        const lastSeen    = {{}};  // type -> last time it was reported
+        let pendingSync = null;     // latest violation not yet written to the parent page
+        let syncScheduled = false;
 
         // ---- DOM refs ----
         const alertEl    = document.getElementById('proctor-alert');
@@ -148,18 +213,20 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
         function recordProctorViolation(type, detail) {{
             const now = Date.now();
             // Cooldown: don't spam the same type over and over
-            if (type === lastViolationType && (now - lastViolationTime) < VIOLATION_COOLDOWN) {{
-                return;
+            if (now - (lastSeen[type] || 0) > COOLDOWN_RESET) {{
+                cooldowns[type] = BASE_COOLDOWN;
             }}
-            lastViolationType = type;
-            lastViolationTime = now;
+            lastSeen[type] = now;
+            if (now < (nextAllowed[type] || 0)) return;
+            nextAllowed[type] = now + cooldowns[type];
+            cooldowns[type] = Math.min(cooldowns[type] * 2, MAX_COOLDOWN);
 
             proctorViolations++;
-            localStorage.setItem('proctor_violations_' + SESSION_ID, proctorViolations);
+            persistViolations();
 
             // Show alert overlay
             if (alertEl) {{
-                alertEl.style.display = 'flex';
+                alertEl.hidden = false;
                 const iconMap = {{
                     no_face: '👤',
                     multiple_faces: '👥',
@@ -181,31 +248,46 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
                     'Total proctoring violations this session: ' + proctorViolations;
             }}
 
+            pendingSync = {{ count: proctorViolations, type, detail,
+                            timestamp: new Date().toISOString() }};
+            if (!syncScheduled) {{
+                syncScheduled = true;
+                const idle = window.requestIdleCallback ||
+                             ((cb) => setTimeout(cb, 200));
+                idle(flushViolationSync, {{ timeout: 1000 }});
+            }}
+        }}
+
+        // Writes the latest violation to the parent page once the browser is
+        // idle, so a burst of violations costs a single URL/storage update
+        function flushViolationSync() {{
+            syncScheduled = false;
+            const p = pendingSync;
+            if (!p) return;
+            pendingSync = null;
+
             // Persist in URL params so Python (Streamlit) picks it up on next rerun
             try {{
                 const url = new URL(window.parent.location.href);
-                url.searchParams.set('proctor_violation', proctorViolations);
-                url.searchParams.set('proctor_type', type);
+                url.searchParams.set('proctor_violation', p.count);
+                url.searchParams.set('proctor_type', p.type);
                 window.parent.history.replaceState(null, '', url.toString());
             }} catch(e) {{}}
 
             // Also stash in sessionStorage as backup
             try {{
                 window.parent.sessionStorage.setItem(
-                    'proctor_violation_' + SESSION_ID,
-                    JSON.stringify({{ count: proctorViolations, type, detail,
-                                     timestamp: new Date().toISOString() }})
+                    'proctor_violation_' + SESSION_ID, JSON.stringify(p)
                 );
             }} catch(e) {{}}
         }}
 
-        // ---- Dismiss overlay & trigger Streamlit rerun to sync DB ----
+        // ---- Dismiss overlay ----
+        // The count is already in the URL; the Python sync fragment picks it
+        // up without reloading the page (which would restart the webcam and
+        // re-download the models)
         window.dismissProctorAlert = function() {{
-            if (alertEl) alertEl.style.display = 'none';
-            // Navigate to updated URL → forces Streamlit rerun → Python writes to DB
-            try {{
-                window.parent.location.href = window.parent.location.href;
-            }} catch(e) {{}}
+            if (alertEl) alertEl.hidden = true;
         }};
 
         // ---- Minimize / maximise preview ----
@@ -234,7 +316,7 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
 
             try {{
                 const stream = await navigator.mediaDevices.getUserMedia({{
-                    video: {{ width: 320, height: 240, facingMode: 'user' }}
+                    video: {{ width: 160, height: 120, facingMode: 'user' }}
                 }});
 
                 video  = document.getElementById('proctor-video');
@@ -246,8 +328,17 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
 
                 updateStatus('Loading AI…', '#F59E0B');
 
-                const MODEL_URL =
-                    'https://cdn.jsdelivr.net/gh/justadudewhohacks/face-api.js@master/weights';
+                // Run inference on the GPU; tfjs falls back to CPU by itself
+                // if WebGL is unavailable
+                try {{
+                    await faceapi.tf.setBackend('webgl');
+                    await faceapi.tf.ready();
+                }} catch (e) {{
+                    console.warn('WebGL backend unavailable:', e);
+                }}
+                console.info('face-api tfjs backend:', faceapi.tf.getBackend());
+
+                const MODEL_URL = '{FACE_MODEL_URL}';
                 await Promise.all([
                     faceapi.nets.tinyFaceDetector.loadFromUri(MODEL_URL),
                     faceapi.nets.faceLandmark68TinyNet.loadFromUri(MODEL_URL),
@@ -268,109 +359,186 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
         }}
 
         // ---- Detection loop ----
+        // Each pass schedules the next one only after it finishes, so a slow
+        // detection can never overlap the next. (Not requestAnimationFrame:
+        // this component lives in a zero-height iframe, where browsers may
+        // stop delivering animation frames.) The loop pauses while the tab
+        // is hidden.
         function startDetection() {{
             if (!modelsLoaded || !video) return;
+            detectorOptions = new faceapi.TinyFaceDetectorOptions({{
+                inputSize: 128,
+                scoreThreshold: 0.4
+            }});
+            document.addEventListener('visibilitychange', onVisibilityChange);
+            scheduleDetection();
+        }}
 
-            detectionInterval = setInterval(async () => {{
-                if (!video || video.paused || video.ended || video.readyState < 2) return;
+        function onVisibilityChange() {{
+            if (document.hidden) {{
+                clearTimeout(detectionTimer);
+                detectionTimer = null;
+                // Time spent hidden must not count towards a violation
+                noFaceSince = 0;    noFaceFired = false;
+                multiFaceSince = 0; multiFaceFired = false;
+            }} else if (!detectionTimer && !detectionInFlight) {{
+                stableSince = 0;
+                scheduleDetection();
+            }}
+        }}
 
-                let detections;
+        function scheduleDetection() {{
+            detectionTimer = setTimeout(async () => {{
+                detectionTimer = null;
+                detectionInFlight = true;
+                calm = false;
                 try {{
-                    detections = await faceapi
-                        .detectAllFaces(video,
-                            new faceapi.TinyFaceDetectorOptions({{
-                                inputSize: 224,
-                                scoreThreshold: 0.4
-                            }}))
-                        .withFaceLandmarks(true);
-                }} catch(e) {{
-                    return; // detection frame dropped — harmless
+                    await detectOnce();
+                }} finally {{
+                    detectionInFlight = false;
+                    if (!calm) stableSince = 0;
+                    else if (!stableSince) stableSince = Date.now();
+                    if (!document.hidden) scheduleDetection();
                 }}
+            }}, stableSince && Date.now() - stableSince > STABLE_AFTER
+                ? DETECTION_SLOW : DETECTION_FAST);
+        }}
 
-                // Resize canvas to match video
-                canvas.width  = video.videoWidth  || 320;
-                canvas.height = video.videoHeight || 240;
-                if (ctx) ctx.clearRect(0, 0, canvas.width, canvas.height);
-
-                const faceCount = detections.length;
+        async function detectOnce() {{
+            if (!video || video.paused || video.ended || video.readyState < 2) return;
 
-                // Draw bounding boxes
-                detections.forEach(det => {{
-                    const box = det.detection.box;
-                    if (ctx) {{
-                        ctx.strokeStyle = faceCount === 1 ? '#10B981' : '#EF4444';
-                        ctx.lineWidth   = 2;
-                        ctx.strokeRect(box.x, box.y, box.width, box.height);
+            let detections;
+            let landmarks = null;
+            try {{
+                detections = await faceapi.detectAllFaces(video, detectorOptions);
+                // The landmark net only feeds the gaze check, which needs
+                // exactly one face; run it on that face's crop alone
+                if (detections.length === 1) {{
+                    const box = detections[0].box;
+                    // A still face has still landmarks: reuse the last set
+                    // while the box has barely moved, refreshing now and then
+                    if (lastLandmarks && landmarkReuses < LANDMARK_MAX_REUSE &&
+                        Math.abs(box.x - lastBox.x) + Math.abs(box.y - lastBox.y) +
+                        Math.abs(box.width - lastBox.width) < BOX_STILL_PX) {{
+                        landmarks = lastLandmarks;
+                        landmarkReuses++;
+                    }} else {{
+                        const [face] = await faceapi.extractFaces(video, detections);
+                        landmarks = (await faceapi.detectFaceLandmarksTiny(face))
+                            .shiftBy(box.x, box.y);
+                        lastLandmarks = landmarks;
+                        lastBox = box;
+                        landmarkReuses = 0;
                     }}
-                }});
+                }}
+            }} catch(e) {{
+                return; // detection frame dropped — harmless
+            }}
 
-                // ── No face ──────────────────────────────────────────────
-                if (faceCount === 0) {{
-                    if (!noFaceTimer) {{
-                        noFaceTimer = setTimeout(() => {{
-                            recordProctorViolation('no_face',
-                                'No face detected for ' + (NO_FACE_DELAY / 1000) +
-                                ' seconds. Please stay visible to the camera.');
-                            updateStatus('No Face!', '#EF4444');
-                        }}, NO_FACE_DELAY);
-                    }}
-                }} else {{
-                    if (noFaceTimer) {{ clearTimeout(noFaceTimer); noFaceTimer = null; }}
+            // Resize canvas to match video; assigning width/height reallocates
+            // the backing store, so only do it when the size changes
+            const vw = video.videoWidth  || 160;
+            const vh = video.videoHeight || 120;
+            if (vw !== canvasW || vh !== canvasH) {{
+                canvas.width  = canvasW = vw;
+                canvas.height = canvasH = vh;
+            }}
+            if (ctx) ctx.clearRect(0, 0, canvasW, canvasH);
+
+            const faceCount = detections.length;
+
+            // Draw bounding boxes as one path, stroked once
+            if (ctx && faceCount > 0) {{
+                const path = new Path2D();
+                for (let i = 0; i < faceCount; i++) {{
+                    const box = detections[i].box;
+                    path.rect(box.x, box.y, box.width, box.height);
                 }}
+                ctx.strokeStyle = faceCount === 1 ? '#10B981' : '#EF4444';
+                ctx.lineWidth   = 2;
+                ctx.stroke(path);
+            }}
 
-                // ── Multiple faces ────────────────────────────────────────
-                if (faceCount > 1) {{
-                    if (!multiFaceTimer) {{
-                        multiFaceTimer = setTimeout(() => {{
-                            recordProctorViolation('multiple_faces',
-                                faceCount + ' faces detected. Only the candidate should be visible.');
-                            updateStatus(faceCount + ' Faces Detected!', '#EF4444');
-                        }}, MULTI_FACE_DELAY);
-                    }}
-                }} else {{
-                    if (multiFaceTimer) {{ clearTimeout(multiFaceTimer); multiFaceTimer = null; }}
+            // ── No face ──────────────────────────────────────────────
+            const now = performance.now();
+            if (faceCount === 0) {{
+                if (!noFaceSince) {{
+                    noFaceSince = now;
+                }} else if (!noFaceFired && now - noFaceSince >= NO_FACE_DELAY) {{
+                    noFaceFired = true;
+                    recordProctorViolation('no_face',
+                        'No face detected for ' + (NO_FACE_DELAY / 1000) +
+                        ' seconds. Please stay visible to the camera.');
+                    updateStatus('No Face!', '#EF4444');
                 }}
+            }} else {{
+                noFaceSince = 0;
+                noFaceFired = false;
+            }}
 
-                // ── Gaze / looking away (single face only) ───────────────
-                if (faceCount === 1 && detections[0].landmarks) {{
-                    const landmarks = detections[0].landmarks;
-                    const leftEye   = landmarks.getLeftEye();   // array of points
-                    const rightEye  = landmarks.getRightEye();
-
-                    if (leftEye.length > 0 && rightEye.length > 0) {{
-                        // Use eye midpoint relative to face box for more reliable gaze
-                        const faceBox = detections[0].detection.box;
-                        const eyeMidX = (
-                            leftEye.reduce( (s, p) => s + p.x, 0) / leftEye.length +
-                            rightEye.reduce((s, p) => s + p.x, 0) / rightEye.length
-                        ) / 2;
-                        const faceCenterX = faceBox.x + faceBox.width / 2;
-                        const deviation   = Math.abs(eyeMidX - faceCenterX) / faceBox.width;
-
-                        if (deviation > GAZE_THRESHOLD) {{
-                            recordProctorViolation('looking_away',
-                                'You appear to be looking away from the screen. Please focus.');
-                            updateStatus('Looking Away!', '#F59E0B');
-                        }} else {{
-                            updateStatus('● Webcam Active', '#10B981');
-                        }}
-                    }} else {{
-                        updateStatus('● Webcam Active', '#10B981');
-                    }}
-                }} else if (faceCount === 1) {{
-                    updateStatus('● Webcam Active', '#10B981');
+            // ── Multiple faces ────────────────────────────────────────
+            if (faceCount > 1) {{
+                if (!multiFaceSince) {{
+                    multiFaceSince = now;
+                }} else if (!multiFaceFired && now - multiFaceSince >= MULTI_FACE_DELAY) {{
+                    multiFaceFired = true;
+                    recordProctorViolation('multiple_faces',
+                        faceCount + ' faces detected. Only the candidate should be visible.');
+                    updateStatus(faceCount + ' Faces Detected!', '#EF4444');
                 }}
+            }} else {{
+                multiFaceSince = 0;
+                multiFaceFired = false;
+            }}
 
-            }}, 1500); // Check every 1.5 s
+            // ── Gaze / looking away (single face only) ───────────────
+            if (faceCount === 1 && landmarks) {{
+                // Eye centroid relative to the face box, read straight from
+                // the 68-point array rather than via getLeftEye/getRightEye,
+                // which copy out a new array each
+                const pts     = landmarks.positions;
+                const faceBox = detections[0].box;
+                let sumX = 0;
+                for (let i = EYE_FIRST; i <= EYE_LAST; i++) sumX += pts[i].x;
+                const dx = sumX / (EYE_LAST - EYE_FIRST + 1) - (faceBox.x + faceBox.width * 0.5);
+                const deviation = (dx < 0 ? -dx : dx) / faceBox.width;
+
+                if (deviation > GAZE_THRESHOLD) {{
+                    recordProctorViolation('looking_away',
+                        'You appear to be looking away from the screen. Please focus.');
+                    updateStatus('Looking Away!', '#F59E0B');
+                }} else {{
+                    calm = true;
+                    updateStatus('● Webcam Active', '#10B981');
+                }}
+            }} else if (faceCount === 1) {{
+                calm = true;
+                updateStatus('● Webcam Active', '#10B981');
+            }}
         }}
 
         // ── Bootstrap ────────────────────────────────────────────────────
         // Small delay to ensure face-api script has executed
         setTimeout(initWebcam, 500);
 
+        // Persist the counter on every violation: Streamlit can unmount this
+        // iframe without firing any unload event, and a lost count would make
+        // the server drop new violations as already seen
+        function persistViolations() {{
+            try {{
+                localStorage.setItem('proctor_violations_' + SESSION_ID, proctorViolations);
+            }} catch(e) {{}}
+        }}
+        document.addEventListener('visibilitychange', () => {{
+            if (document.hidden) persistViolations();
+        }});
+        window.addEventListener('pagehide', persistViolations);
+
         // Cleanup webcam stream on page unload
         window.addEventListener('beforeunload', () => {{
-            if (detectionInterval) clearInterval(detectionInterval);
+            persistViolations();
+            flushViolationSync();
+            if (detectionTimer) clearTimeout(detectionTimer);
             if (video && video.srcObject) {{
                 video.srcObject.getTracks().forEach(t => t.stop());
             }}
@@ -379,7 +547,6 @@ def inject_webcam_proctor(session_id: int, sensitivity: str = "medium"):
     }})();
     </script>
     """
-    components.html(proctor_html, height=0)
 
 
 def get_proctor_violation_badge() -> str: